@@ -0,0 +1,153 @@
+import threading
+import traceback
+import weakref
+import Profiler
+import RWLock
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+# Number of query results kept between log changes
+result_cache_size = 64
+
+#----------------------------------------------------------------------------------------------------------
+# AggregateStore Class
+#----------------------------------------------------------------------------------------------------------
+# One per log file per process, shared by every session. The log store's date index, rollups and interval
+# index are brought up to date once per change to the log, and each query's result is kept until the next
+# change, so however many sessions show the same dates the work is done once.
+#
+# Updates take the write side of a reader/writer lock and queries the read side, so a query never mixes
+# results from before and after an update. Subscribers are called with the new version after each update.
+class AggregateStore:
+    def __init__(self, log_store):
+        self._log_store = log_store
+        self._lock = RWLock.RWLock()
+        self._version = 0
+        self._source = None
+        self._results = {}
+        self._results_lock = threading.Lock()
+        # Keys being computed, each with an event set once its result is stored
+        self._pending = {}
+        self._subscribers = {}
+        self._subscribers_lock = threading.Lock()
+        self._next_token = 0
+
+    # Getters
+    def get_log_store(self):
+        return self._log_store
+
+    # Changes whenever the log does
+    def get_version(self):
+        return self._version
+
+    # callback(version) runs on the updating thread. Bound methods are held weakly, so a subscriber owned by
+    # a session goes away with the session instead of needing to unsubscribe.
+    def subscribe(self, callback):
+        with self._subscribers_lock:
+            token = self._next_token
+            self._next_token += 1
+            self._subscribers[token] = weakref.WeakMethod(callback) if hasattr(callback, "__self__") \
+                else (lambda: callback)
+            return token
+
+    def unsubscribe(self, token):
+        with self._subscribers_lock:
+            self._subscribers.pop(token, None)
+
+    # Takes in anything written to the log since the last refresh, from this process or any other.
+    # Returns True if the log had changed. An unchanged log costs two stat calls and never waits on readers.
+    def refresh(self):
+        if self._log_store.get_version() == self._source:
+            return False
+        with Profiler.span("aggregates.refresh"), self._lock.write():
+            source = self._log_store.get_version()
+            if source == self._source:
+                return False
+            self._log_store.refresh()
+            self._source = source
+            with self._results_lock:
+                self._results = {}
+            self._version += 1
+            version = self._version
+        self._notify(version)
+        return True
+
+    def _notify(self, version):
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers.items())
+        for token, reference in subscribers:
+            callback = reference()
+            if callback is None:
+                self.unsubscribe(token)
+                continue
+            try:
+                callback(version)
+            except Exception:
+                traceback.print_exc()
+
+    # Returns the cached result for key, computing it if this version of the log has not been asked yet.
+    # Only one caller computes a key; sessions asking for it meanwhile wait for that result. Results are
+    # shared between sessions, so callers must not modify them.
+    def _cached(self, key, compute):
+        with self._lock.read():
+            while True:
+                with self._results_lock:
+                    if key in self._results:
+                        Profiler.count("aggregate_hits")
+                        return self._results[key]
+                    pending = self._pending.get(key)
+                    if pending is None:
+                        pending = self._pending[key] = threading.Event()
+                        break
+                # If the computing caller fails, the next pass finds no result and computes it here
+                pending.wait()
+
+            try:
+                # The version cannot change while the read lock is held, so the result is stored against it
+                value = compute()
+                Profiler.count("aggregate_misses")
+                with self._results_lock:
+                    if len(self._results) >= result_cache_size:
+                        self._results.pop(next(iter(self._results)))
+                    self._results[key] = value
+            finally:
+                with self._results_lock:
+                    self._pending.pop(key, None)
+                pending.set()
+            return value
+
+    # Queries, answered from the log store once per change to the log
+    def read_dates(self, first_date, last_date):
+        self.refresh()
+        return self._cached(("read_dates", str(first_date), str(last_date)),
+                            lambda: self._log_store.read_dates(first_date, last_date))
+
+    def area_seconds_between(self, first_date, last_date):
+        self.refresh()
+        return self._cached(("area_seconds_between", str(first_date), str(last_date)),
+                            lambda: self._log_store.area_seconds_between(first_date, last_date))
+
+    def daily_area_seconds(self, first_date, last_date):
+        self.refresh()
+        return self._cached(("daily_area_seconds", str(first_date), str(last_date)),
+                            lambda: self._log_store.daily_area_seconds(first_date, last_date))
+
+#----------------------------------------------------------------------------------------------------------
+# ChangeFlag Class
+#----------------------------------------------------------------------------------------------------------
+# Subscriber that remembers whether the store changed since its owner last looked
+class ChangeFlag:
+    def __init__(self):
+        self._latest = 0
+        self._seen = 0
+
+    def set(self, version):
+        self._latest = version
+
+    # True once per change
+    def take(self):
+        latest = self._latest
+        changed = latest != self._seen
+        self._seen = latest
+        return changed
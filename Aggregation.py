@@ -0,0 +1,83 @@
+import datetime
+import time
+import numpy as np
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+epoch_ordinal = datetime.date(1970, 1, 1).toordinal()
+
+#----------------------------------------------------------------------------------------------------------
+# Local time helpers for arrays of epoch seconds
+#----------------------------------------------------------------------------------------------------------
+# UTC offsets are looked up once per distinct hour, so DST is honoured without a per-row call.
+def utc_offsets(epochs):
+    epochs = np.asarray(epochs, dtype="f8")
+    if epochs.size == 0:
+        return np.empty(0, dtype="f8")
+    hours, inverse = np.unique(np.floor(epochs / 3600), return_inverse=True)
+    offsets = np.array([time.localtime(h * 3600).tm_gmtoff for h in hours], dtype="f8")
+    return offsets[inverse]
+
+# Local calendar day of each epoch, as days since 1970-01-01
+def local_days(epochs):
+    epochs = np.asarray(epochs, dtype="f8")
+    return np.floor((epochs + utc_offsets(epochs)) / 86400).astype("i8")
+
+def day_number(date):
+    return date.toordinal() - epoch_ordinal
+
+def day_date(day):
+    return datetime.date.fromordinal(int(day) + epoch_ordinal)
+
+#----------------------------------------------------------------------------------------------------------
+# Sums seconds per (key, area code) in one np.bincount pass
+#----------------------------------------------------------------------------------------------------------
+# Returns (distinct keys, distinct area codes, grid) where grid[i, j] is the seconds for keys[i], codes[j].
+def bucket_area_seconds(keys, codes, seconds):
+    key_values, key_index = np.unique(keys, return_inverse=True)
+    code_values, code_index = np.unique(codes, return_inverse=True)
+    size = len(key_values) * len(code_values)
+    grid = np.bincount(key_index * len(code_values) + code_index, weights=seconds, minlength=size)
+    return key_values, code_values, grid.reshape(len(key_values), len(code_values))
+
+#----------------------------------------------------------------------------------------------------------
+# Epoch seconds of local midnight for each date from first_date to the day after last_date
+#----------------------------------------------------------------------------------------------------------
+# Returns one more edge than there are days, so day i covers [edges[i], edges[i + 1]).
+def day_edges(first_date, last_date):
+    return np.array([time.mktime(day_date(day).timetuple())
+                     for day in range(day_number(first_date), day_number(last_date) + 2)], dtype="f8")
+
+#----------------------------------------------------------------------------------------------------------
+# Splits [start, stop) intervals at sorted bucket edges
+#----------------------------------------------------------------------------------------------------------
+# Returns (bucket, seconds, row) for every piece inside [edges[0], edges[-1]). An interval that crosses an
+# edge yields one piece per bucket it touches, and the parts outside the edges are clipped off.
+def split_at_edges(start, stop, edges):
+    edges = np.asarray(edges, dtype="f8")
+    start = np.maximum(np.asarray(start, dtype="f8"), edges[0])
+    stop = np.minimum(np.asarray(stop, dtype="f8"), edges[-1])
+    rows = np.flatnonzero(stop > start)
+    start, stop = start[rows], stop[rows]
+
+    first = np.searchsorted(edges, start, side="right") - 1
+    last = np.searchsorted(edges, stop, side="left") - 1
+    parts = last - first + 1
+    piece_row = np.repeat(np.arange(len(rows)), parts)
+    bucket = first[piece_row] + np.arange(len(piece_row)) - np.repeat(np.cumsum(parts) - parts, parts)
+    seconds = np.minimum(stop[piece_row], edges[bucket + 1]) - np.maximum(start[piece_row], edges[bucket])
+    return bucket, seconds, rows[piece_row]
+
+#----------------------------------------------------------------------------------------------------------
+# Seconds per area for every day from first_date to last_date inclusive
+#----------------------------------------------------------------------------------------------------------
+# Entries that run past midnight are split between the days they cover. Returns (area codes, grid[day, area]).
+def daily_area_seconds(start, stop, codes, first_date, last_date):
+    edges = day_edges(first_date, last_date)
+    days, seconds, rows = split_at_edges(start, stop, edges)
+
+    code_values, code_index = np.unique(np.asarray(codes)[rows], return_inverse=True)
+    size = (len(edges) - 1) * len(code_values)
+    grid = np.bincount(days * len(code_values) + code_index, weights=seconds, minlength=size)
+    return code_values, grid.reshape(len(edges) - 1, len(code_values))
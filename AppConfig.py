@@ -0,0 +1,24 @@
+import ast
+import os
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+app_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "TE_Timekeeping_toStreamLit.py")
+
+#----------------------------------------------------------------------------------------------------------
+# Reads literal globals (areas, idle_label, area_colors, ...) from the Streamlit app without running it
+#----------------------------------------------------------------------------------------------------------
+def load_app_globals(names, path=app_file):
+    with open(path, mode="r", encoding="utf-8") as file:
+        tree = ast.parse(file.read())
+    values = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            if node.targets[0].id in names:
+                values[node.targets[0].id] = ast.literal_eval(node.value)
+    return values
+
+def load_app_areas(path=app_file):
+    values = load_app_globals(("areas", "idle_label"), path)
+    return values["areas"], values["idle_label"]
@@ -0,0 +1,167 @@
+import gzip
+import json
+import os
+import threading
+import numpy as np
+import Aggregation
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+index_name = "segments.json"
+
+# ctime strings drop fractions of a second, so entries this close count as back-to-back
+merge_gap = 1.0
+
+#----------------------------------------------------------------------------------------------------------
+# Local calendar month of each epoch, as months since 1970-01, and its "YYYY-MM" key
+#----------------------------------------------------------------------------------------------------------
+def local_months(epochs):
+    return Aggregation.local_days(epochs).astype("datetime64[D]").astype("datetime64[M]").astype("i8")
+
+def month_key(month):
+    return str(np.datetime64(int(month), "M"))
+
+#----------------------------------------------------------------------------------------------------------
+# Cleans up (start, stop, area code, user) arrays
+#----------------------------------------------------------------------------------------------------------
+# Drops zero-length entries and exact duplicates, then merges entries by the same user in the same area that
+# end and start back to back. Entries by different users are never merged or treated as duplicates, since
+# a shared log holds several engineers' time. The result is sorted by start.
+def compact_arrays(start, stop, codes, users):
+    users = np.asarray(users, dtype=object)
+    keep = stop > start
+    start, stop, codes, users = start[keep], stop[keep], codes[keep], users[keep]
+    if len(start) == 0:
+        return start, stop, codes, users
+    _, user_keys = np.unique(users.astype(str), return_inverse=True)
+    order = np.lexsort((user_keys, codes, stop, start))
+    start, stop, codes, users, user_keys = start[order], stop[order], codes[order], users[order], user_keys[order]
+
+    repeated = np.zeros(len(start), dtype=bool)
+    repeated[1:] = ((start[1:] == start[:-1]) & (stop[1:] == stop[:-1]) & (codes[1:] == codes[:-1])
+                    & (user_keys[1:] == user_keys[:-1]))
+    start, stop, codes, users, user_keys = (start[~repeated], stop[~repeated], codes[~repeated], users[~repeated],
+                                            user_keys[~repeated])
+
+    # Back-to-back entries of one user may have other users' entries sorted between them, so each user's
+    # entries are merged on their own
+    joins = np.zeros(len(start), dtype=bool)
+    merged_stop = stop.copy()
+    for user_key in np.unique(user_keys):
+        rows = np.flatnonzero(user_keys == user_key)
+        user_joins = np.zeros(len(rows), dtype=bool)
+        user_joins[1:] = ((codes[rows[1:]] == codes[rows[:-1]])
+                          & (np.abs(start[rows[1:]] - stop[rows[:-1]]) <= merge_gap))
+        firsts = np.flatnonzero(~user_joins)
+        merged_stop[rows[firsts]] = np.maximum.reduceat(stop[rows], firsts)
+        joins[rows] = user_joins
+    firsts = np.flatnonzero(~joins)
+    return start[firsts], merged_stop[firsts], codes[firsts], users[firsts]
+
+#----------------------------------------------------------------------------------------------------------
+# Archive Class
+#----------------------------------------------------------------------------------------------------------
+# Completed months of a log, each gzip-compressed in the log's own format under <log>.archive/.
+# segments.json lists every segment's month, row count, earliest start and latest stop, so readers only
+# open the segments that overlap the time range they need.
+class Archive:
+    def __init__(self, log_file, extension):
+        self._log_file = log_file
+        self._extension = extension
+        self._directory = log_file + ".archive"
+        self._index_file = os.path.join(self._directory, index_name)
+        self._lock = threading.Lock()
+        self._version = None
+        self._segments = []
+
+    # Getters
+    def get_directory(self):
+        return self._directory
+
+    # Changes whenever the archive does
+    def get_version(self):
+        self.get_segments()
+        return self._version
+
+    # Returns the listed segments, oldest first, reloading the index if it changed on disk
+    def get_segments(self):
+        with self._lock:
+            try:
+                stat = os.stat(self._index_file)
+                version = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            except FileNotFoundError:
+                version = None
+            if version != self._version:
+                self._segments = self._load() if version else []
+                self._version = version
+            return list(self._segments)
+
+    def _load(self):
+        try:
+            with open(self._index_file, mode="r") as file:
+                return sorted(json.load(file)["segments"], key=lambda segment: segment["month"])
+        except (OSError, ValueError, KeyError):
+            return []
+
+    # Returns the segments holding entries that overlap [t0, t1)
+    def segments_between(self, t0, t1):
+        return [segment for segment in self.get_segments()
+                if segment["min_start"] < t1 and segment["max_stop"] > t0]
+
+    def find(self, month):
+        for segment in self.get_segments():
+            if segment["month"] == month:
+                return segment
+        return None
+
+    def read_segment(self, segment):
+        with gzip.open(os.path.join(self._directory, segment["file"]), mode="rb") as file:
+            return file.read()
+
+    # Yields the raw bytes of each segment in turn (all of them by default)
+    def iter_bytes(self, segments=None):
+        for segment in self.get_segments() if segments is None else segments:
+            yield self.read_segment(segment)
+
+    # Writes segments given as (month key, data, rows, min start, max stop), replacing any for the same month.
+    # Returns a function that puts the archive back the way it was, for when the log swap that follows fails.
+    def write_segments(self, new_segments):
+        os.makedirs(self._directory, exist_ok=True)
+        segments = {segment["month"]: segment for segment in self.get_segments()}
+        backups = {}
+        for month, data, rows, min_start, max_stop in new_segments:
+            file_name = f"{month}{self._extension}.gz"
+            path = os.path.join(self._directory, file_name)
+            backups[path] = _read_bytes(path)
+            _replace_bytes(path, gzip.compress(data))
+            segments[month] = {"month": month, "file": file_name, "rows": int(rows),
+                               "min_start": float(min_start), "max_stop": float(max_stop)}
+
+        backups[self._index_file] = _read_bytes(self._index_file)
+        index = {"segments": sorted(segments.values(), key=lambda segment: segment["month"])}
+        _replace_bytes(self._index_file, json.dumps(index, indent=2).encode())
+
+        def undo():
+            for path, data in backups.items():
+                if data is None:
+                    os.remove(path)
+                else:
+                    _replace_bytes(path, data)
+        return undo
+
+def _read_bytes(path):
+    try:
+        with open(path, mode="rb") as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+# Writes to a temporary file first, so a crash never leaves a half-written segment or index
+def _replace_bytes(path, data):
+    tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_file, mode="wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_file, path)
@@ -0,0 +1,103 @@
+import functools
+import io
+import Profiler
+# matplotlib is imported on the first render, so pages without a chart never load it
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+dark_blue = '#1f2630' # Nice dark blue hex code
+default_color = "#808080"
+
+# Rendered charts kept in memory; the least recently used one is dropped first
+chart_cache_size = 32
+
+#----------------------------------------------------------------------------------------------------------
+# Pie chart of time spent by area, rendered to PNG on the server
+#----------------------------------------------------------------------------------------------------------
+# area_totals and area_colors are tuples of (area, seconds) and (area, color) so they can key the cache.
+# Repeat renders of an unchanged day return the cached PNG without touching matplotlib.
+@functools.lru_cache(maxsize=chart_cache_size)
+def pie_chart_png(area_totals, area_colors):
+    # Only cache misses reach this span
+    with Profiler.span("chart.render"):
+        fig = draw_pie_chart(area_totals, dict(area_colors))
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=200, bbox_inches="tight", facecolor=fig.get_facecolor())
+        # Figure() is never registered with pyplot, so clearing it is all the cleanup it needs
+        fig.clear()
+        return buffer.getvalue()
+
+def draw_pie_chart(area_totals, area_colors):
+    from matplotlib.figure import Figure
+    areas = [area for area, _ in area_totals]
+    seconds = [total for _, total in area_totals]
+    legend_labels = [f"{area} ({round(total / 3600, 2)} hrs)" for area, total in area_totals]
+
+    # Map colors to the areas present in the data
+    # Use a default gray if area name not found in map
+    pie_colors = [area_colors.get(area, default_color) for area in areas]
+
+    # Create figure with dark background
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    fig.patch.set_facecolor(dark_blue)
+    ax.set_facecolor(dark_blue)
+
+    # Create pie chart
+    wedges, texts = ax.pie(
+        seconds,
+        labels=None,
+        startangle=90,
+        colors=pie_colors,
+        textprops=dict(color="white")
+    )
+
+    # Set title to white
+    ax.set_title("Time Distribution", color='white')
+
+    # Add Legend
+    legend = ax.legend(wedges, legend_labels,
+                       title="Work Areas",
+                       loc="center left",
+                       bbox_to_anchor=(1, 0, 0.5, 1))
+
+    # Style the legend for dark mode
+    legend.get_title().set_color('white')
+    for text in legend.get_texts():
+        text.set_color("white")
+    legend.get_frame().set_facecolor(dark_blue)
+    legend.get_frame().set_edgecolor('white')
+
+    # Equal aspect ratio ensures that pie is drawn as a circle
+    ax.axis('equal')
+
+    fig.tight_layout()
+    return fig
+
+#----------------------------------------------------------------------------------------------------------
+# Same chart as a Vega-Lite spec, drawn in the browser instead of on the server
+#----------------------------------------------------------------------------------------------------------
+def pie_chart_spec(area_totals, area_colors):
+    area_colors = dict(area_colors)
+    values = [{"Area": area, "Hours": round(total / 3600, 2), "Label": f"{area} ({round(total / 3600, 2)} hrs)"}
+              for area, total in area_totals]
+    return {
+        "title": "Time Distribution",
+        "data": {"values": values},
+        "mark": {"type": "arc"},
+        "encoding": {
+            "theta": {"field": "Hours", "type": "quantitative"},
+            "color": {
+                "field": "Label",
+                "type": "nominal",
+                "title": "Work Areas",
+                "sort": None,
+                "scale": {
+                    "domain": [value["Label"] for value in values],
+                    "range": [area_colors.get(area, default_color) for area, _ in area_totals],
+                },
+            },
+            "tooltip": [{"field": "Area"}, {"field": "Hours", "type": "quantitative"}],
+        },
+    }
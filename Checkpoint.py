@@ -0,0 +1,122 @@
+import glob
+import json
+import os
+import re
+import socket
+import threading
+import TimePeriod
+
+#----------------------------------------------------------------------------------------------------------
+# Owners: who holds a period open
+#----------------------------------------------------------------------------------------------------------
+# An owner is "<host>.<pid>" for an app process, or "<host>.<pid>.<session>" for one Streamlit session in it.
+# That is enough to tell, from the same host, whether the owner is still running.
+def owner_id(session=None):
+    parts = [socket.gethostname(), str(os.getpid())] + ([session] if session else [])
+    return ".".join(re.sub(r"[^\w-]", "_", part) for part in parts)
+
+# True if the owner has certainly stopped: its process on this host has exited, or it is a session of this
+# process that is_active_session(session) reports gone. Owners on other hosts are never reported gone,
+# since nothing here can tell.
+def is_gone(owner, is_active_session=None):
+    if owner is None:
+        # Written before checkpoints named their owner
+        return True
+    host, _, rest = owner.partition(".")
+    pid, _, session = rest.partition(".")
+    if host != owner_id().partition(".")[0] or not pid.isdigit():
+        return False
+    if int(pid) != os.getpid():
+        return not process_alive(int(pid))
+    return bool(session) and is_active_session is not None and not is_active_session(session)
+
+def process_alive(pid):
+    if os.name == "nt":
+        import ctypes
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        # PROCESS_QUERY_LIMITED_INFORMATION; access denied still means the process exists
+        handle = kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return ctypes.get_last_error() == 5
+        try:
+            code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+            return code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+#----------------------------------------------------------------------------------------------------------
+# Checkpoint Class
+#----------------------------------------------------------------------------------------------------------
+# Journal of the periods still open in a log, one small file per owner under <log>.checkpoints/. An owner's
+# file is rewritten whenever its period starts and removed when it stops logging. Several apps and sessions
+# can share a log without touching each other's entries, and after a crash the open area and start time are
+# found from these files instead of the log.
+class Checkpoint:
+    def __init__(self, log_file, fsync=False):
+        self._path = log_file + ".checkpoints"
+        # Single journal written by earlier versions, read once so a period open across the upgrade survives
+        self._legacy_path = log_file + ".checkpoint.json"
+        self._fsync = fsync
+        self._lock = threading.Lock()
+
+    # Getters
+    def get_path(self):
+        return self._path
+
+    def _owner_file(self, owner):
+        return self._legacy_path if owner is None else os.path.join(self._path, f"{owner}.json")
+
+    # Records owner's open period
+    def save(self, time_period, owner):
+        data = json.dumps({"area": time_period.get_area_name(), "start_time": time_period.get_start_time(),
+                           "owner": owner})
+        path = self._owner_file(owner)
+        tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            os.makedirs(self._path, exist_ok=True)
+            with open(tmp_file, mode="w") as file:
+                file.write(data)
+                if self._fsync:
+                    file.flush()
+                    os.fsync(file.fileno())
+            os.replace(tmp_file, path)
+
+    # Returns owner's open TimePeriod, or None if it has none
+    def load(self, owner):
+        return _read(self._owner_file(owner))
+
+    # Returns [(owner, open TimePeriod)] for every period whose owner is gone (see is_gone), oldest first
+    def orphans(self, is_active_session=None):
+        found = []
+        for path in glob.glob(os.path.join(glob.escape(self._path), "*.json")) + [self._legacy_path]:
+            owner = None if path == self._legacy_path else os.path.basename(path)[:-len(".json")]
+            time_period = _read(path)
+            if time_period is not None and is_gone(owner, is_active_session):
+                found.append((owner, time_period))
+        return sorted(found, key=lambda item: item[1].get_start_time())
+
+    # Forgets owner's open period. Returns True only for the caller that removed it, so when several try
+    # to close the same orphan only one logs it.
+    def clear(self, owner):
+        try:
+            os.remove(self._owner_file(owner))
+            return True
+        except FileNotFoundError:
+            return False
+
+def _read(path):
+    try:
+        with open(path, mode="r") as file:
+            saved = json.load(file)
+        return TimePeriod.TimePeriod(start_time=float(saved["start_time"]), area_name=saved["area"])
+    except (OSError, ValueError, KeyError, TypeError):
+        # Missing, or unreadable and so of no use for recovery (save never leaves one half-written)
+        return None
@@ -0,0 +1,54 @@
+import contextlib
+import os
+
+#----------------------------------------------------------------------------------------------------------
+# Exclusive advisory lock on an open log file (fcntl on Linux/macOS, msvcrt on Windows)
+#----------------------------------------------------------------------------------------------------------
+if os.name == "nt":
+    import msvcrt
+
+    # Windows locks are mandatory, so lock a byte far past the data to keep readers unblocked
+    lock_offset = 0x7FFFFFFF
+
+    def _lock(file):
+        position = file.tell()
+        file.seek(lock_offset)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+        file.seek(position)
+
+    def _unlock(file):
+        position = file.tell()
+        file.seek(lock_offset)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+        file.seek(position)
+else:
+    import fcntl
+
+    def _lock(file):
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+
+    def _unlock(file):
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+#----------------------------------------------------------------------------------------------------------
+# Holds the lock while the block writes, flushing before it is released
+#----------------------------------------------------------------------------------------------------------
+@contextlib.contextmanager
+def locked(file, fsync=False):
+    _lock(file)
+    try:
+        yield file
+        file.flush()
+        if fsync:
+            os.fsync(file.fileno())
+    finally:
+        _unlock(file)
+
+#----------------------------------------------------------------------------------------------------------
+# True if file is still the one at path (compaction swaps in a new log file)
+#----------------------------------------------------------------------------------------------------------
+def is_current(file, path):
+    try:
+        return os.stat(path).st_ino == os.fstat(file.fileno()).st_ino
+    except FileNotFoundError:
+        return False
@@ -0,0 +1,155 @@
+import datetime
+import threading
+import numpy as np
+import Aggregation
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+# Newly appended intervals kept in an unsorted tail until there are this many, then merged in one sort
+merge_size = 1024
+
+#----------------------------------------------------------------------------------------------------------
+# IntervalIndex Class
+#----------------------------------------------------------------------------------------------------------
+# Intervals sorted by start, with reach[i] holding the latest stop among the first i + 1 of them. Since reach
+# never decreases, the first interval that can overlap t0 and the last one that starts before t1 are both
+# found with searchsorted, so a range query costs O(log n + k) for the k intervals in between.
+class IntervalIndex:
+    def __init__(self):
+        self._start = np.empty(0, dtype="f8")
+        self._stop = np.empty(0, dtype="f8")
+        self._codes = np.empty(0, dtype="i2")
+        self._reach = np.empty(0, dtype="f8")
+        self._tail = []
+
+    def __len__(self):
+        return len(self._start) + sum(len(start) for start, _, _ in self._tail)
+
+    # Adds (start, stop, area code) arrays; they may arrive in any order
+    def extend(self, start, stop, codes):
+        if len(start) == 0:
+            return
+        self._tail.append((np.asarray(start, dtype="f8"), np.asarray(stop, dtype="f8"),
+                           np.asarray(codes, dtype="i2")))
+        if len(self) - len(self._start) >= merge_size:
+            self._merge()
+
+    def _merge(self):
+        start = np.concatenate([self._start] + [part[0] for part in self._tail])
+        stop = np.concatenate([self._stop] + [part[1] for part in self._tail])
+        codes = np.concatenate([self._codes] + [part[2] for part in self._tail])
+        # Rows are logged roughly in start order, which a stable sort handles in close to linear time
+        order = np.argsort(start, kind="stable")
+        self._start, self._stop, self._codes = start[order], stop[order], codes[order]
+        self._reach = np.maximum.accumulate(self._stop)
+        self._tail = []
+
+    # Returns (start, stop, codes) of every interval overlapping [t0, t1), unclipped
+    def overlapping(self, t0, t1):
+        first = np.searchsorted(self._reach, t0, side="right")
+        last = np.searchsorted(self._start, t1, side="left")
+        parts = [(self._start[first:last], self._stop[first:last], self._codes[first:last])] + self._tail
+        start = np.concatenate([part[0] for part in parts])
+        stop = np.concatenate([part[1] for part in parts])
+        codes = np.concatenate([part[2] for part in parts])
+        keep = (start < t1) & (stop > t0)
+        return start[keep], stop[keep], codes[keep]
+
+    # Returns {area code: seconds} inside [t0, t1), clipping intervals that cross either end
+    def area_seconds(self, t0, t1):
+        start, stop, codes = self.overlapping(t0, t1)
+        seconds = np.minimum(stop, t1) - np.maximum(start, t0)
+        code_values, code_index = np.unique(codes, return_inverse=True)
+        totals = np.bincount(code_index, weights=seconds, minlength=len(code_values))
+        return {int(code): float(total) for code, total in zip(code_values, totals)}
+
+    # Returns (area codes, grid[day, area]) for local days first_date to last_date, split at midnight
+    def daily_area_seconds(self, first_date, last_date):
+        edges = Aggregation.day_edges(first_date, last_date)
+        start, stop, codes = self.overlapping(edges[0], edges[-1])
+        return Aggregation.daily_area_seconds(start, stop, codes, first_date, last_date)
+
+#----------------------------------------------------------------------------------------------------------
+# IntervalFollower Class
+#----------------------------------------------------------------------------------------------------------
+# Keeps an in-memory IntervalIndex of the days queried so far. Entries are read through the date index's
+# byte ranges, so a query parses only the days it covers, and only the first time; bytes appended to those
+# days since are read on the next query. Archived months are loaded the first time a query reaches them.
+class IntervalFollower:
+    def __init__(self, log_index, parser, archive=None):
+        self._log_index = log_index
+        self._parser = parser
+        self._segment_archive = archive
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, generation):
+        self._intervals = IntervalIndex()
+        # Byte ranges of the log already in the index, sorted and merged
+        self._loaded_ranges = []
+        self._loaded_segments = set()
+        self._generation = generation
+
+    # Brings the index up to date for entries overlapping [t0, t1). Entries are indexed by the date they
+    # started, so the day before t0 is read too for ones crossing midnight.
+    def _load(self, t0, t1):
+        self._log_index.refresh()
+        if self._log_index.get_generation() != self._generation:
+            self._reset(self._log_index.get_generation())
+        days = Aggregation.local_days([t0, t1])
+        first_date = Aggregation.day_date(days[0]) - datetime.timedelta(days=1)
+        ranges = subtract_ranges(self._log_index.ranges_between(first_date, Aggregation.day_date(days[1])),
+                                 self._loaded_ranges)
+        if ranges:
+            self._intervals.extend(*self._parser(self._log_index.read_ranges(ranges)))
+            self._loaded_ranges = merge_ranges(self._loaded_ranges + ranges)
+
+        if self._segment_archive is None:
+            return
+        for segment in self._segment_archive.segments_between(t0, t1):
+            if segment["file"] not in self._loaded_segments:
+                self._intervals.extend(*self._parser(self._segment_archive.read_segment(segment)))
+                self._loaded_segments.add(segment["file"])
+
+    def area_seconds(self, t0, t1):
+        with self._lock:
+            self._load(t0, t1)
+            return self._intervals.area_seconds(t0, t1)
+
+    def daily_area_seconds(self, first_date, last_date):
+        edges = Aggregation.day_edges(first_date, last_date)
+        with self._lock:
+            self._load(edges[0], edges[-1])
+            return self._intervals.daily_area_seconds(first_date, last_date)
+
+#----------------------------------------------------------------------------------------------------------
+# Byte range helpers
+#----------------------------------------------------------------------------------------------------------
+# Sorts (start, end) ranges and joins the ones that touch or overlap
+def merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+# Returns the parts of ranges not covered by taken (sorted and merged)
+def subtract_ranges(ranges, taken):
+    left = []
+    for start, end in ranges:
+        for taken_start, taken_end in taken:
+            if taken_end <= start:
+                continue
+            if taken_start >= end:
+                break
+            if taken_start > start:
+                left.append((start, taken_start))
+            start = taken_end
+            if start >= end:
+                break
+        if start < end:
+            left.append((start, end))
+    return left
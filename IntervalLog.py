@@ -0,0 +1,153 @@
+import array
+import datetime
+import math
+import numpy as np
+import Aggregation
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+# Intervals held before the oldest half is dropped; at 18 bytes each this caps the arrays near 1 MB
+default_capacity = 1 << 16
+
+# Room allocated by an empty log, doubled as it fills
+initial_size = 256
+
+#----------------------------------------------------------------------------------------------------------
+# IntervalLog Class
+#----------------------------------------------------------------------------------------------------------
+# Closed intervals in typed arrays: start and stop as array('d') and the area as an array('h') code, the same
+# layout as the binary log. Appends write into spare room at the end. Growing or dropping old intervals
+# builds new arrays rather than resizing the old ones, so NumPy and pandas views of a snapshot share its
+# memory and stay valid after later appends.
+class IntervalLog:
+    def __init__(self, area_codes=None, capacity=default_capacity):
+        self._area_codes = dict(area_codes or {})
+        self._capacity = capacity
+        self._source = None
+        self.clear()
+
+    def clear(self):
+        self._start, self._stop, self._codes = _allocate(min(initial_size, self._capacity))
+        self._size = 0
+        # Intervals stopping before this may have been dropped to stay under capacity
+        self._dropped_until = -math.inf
+
+    def __len__(self):
+        return self._size
+
+    # Getters
+    def get_capacity(self):
+        return self._capacity
+
+    def get_area_codes(self):
+        return dict(self._area_codes)
+
+    def get_area_names(self):
+        return {code: name for name, code in self._area_codes.items()}
+
+    def get_dropped_until(self):
+        return self._dropped_until
+
+    # Returns the code for an area name, assigning a new one if the name is unknown
+    def area_code(self, area_name):
+        area_name = str(area_name)
+        if area_name not in self._area_codes:
+            self._area_codes[area_name] = max(self._area_codes.values(), default=0) + 1
+        return self._area_codes[area_name]
+
+    def append(self, area_name, start_time, stop_time):
+        if self._size == len(self._start):
+            self._make_room()
+        self._start[self._size] = start_time
+        self._stop[self._size] = stop_time
+        self._codes[self._size] = self.area_code(area_name)
+        self._size += 1
+
+    # Adds (start, stop, area code) arrays, with codes from this log's table
+    def extend(self, start, stop, codes):
+        for start_time, stop_time, code in zip(np.asarray(start, dtype="f8").tolist(),
+                                               np.asarray(stop, dtype="f8").tolist(),
+                                               np.asarray(codes, dtype="i2").tolist()):
+            if self._size == len(self._start):
+                self._make_room()
+            self._start[self._size] = start_time
+            self._stop[self._size] = stop_time
+            self._codes[self._size] = code
+            self._size += 1
+
+    def _make_room(self):
+        keep = self._size
+        if self._size >= self._capacity:
+            # Drop the oldest half; the intervals kept are only the ones logged after it
+            dropped = self._size - self._capacity // 2
+            self._dropped_until = max(self._dropped_until, max(self._stop[:dropped]))
+            keep = self._size - dropped
+        start, stop, codes = _allocate(min(max(2 * keep, initial_size), self._capacity))
+        start[:keep] = self._start[self._size - keep:self._size]
+        stop[:keep] = self._stop[self._size - keep:self._size]
+        codes[:keep] = self._codes[self._size - keep:self._size]
+        self._start, self._stop, self._codes, self._size = start, stop, codes, keep
+
+    # True if every interval overlapping t0 or later is still held
+    def covers(self, t0):
+        return t0 >= self._dropped_until
+
+    # Returns read-only (start, stop, area code) NumPy views of the intervals held now, without copying
+    def arrays(self):
+        views = (np.frombuffer(self._start, dtype="f8", count=self._size),
+                 np.frombuffer(self._stop, dtype="f8", count=self._size),
+                 np.frombuffer(self._codes, dtype="i2", count=self._size))
+        for view in views:
+            view.flags.writeable = False
+        return views
+
+    # Same as a pandas frame with "start", "stop" and "area" (code) columns sharing the arrays' memory
+    def to_frame(self):
+        import pandas as pd
+        start, stop, codes = self.arrays()
+        return pd.DataFrame({"start": start, "stop": stop, "area": codes}, copy=False)
+
+    # Returns {area name: seconds} logged within [t0, t1), clipping intervals at both ends
+    def area_seconds(self, t0, t1):
+        start, stop, codes = self.arrays()
+        keep = (start < t1) & (stop > t0)
+        seconds = np.minimum(stop[keep], t1) - np.maximum(start[keep], t0)
+        code_values, code_index = np.unique(codes[keep], return_inverse=True)
+        totals = np.bincount(code_index, weights=seconds, minlength=len(code_values))
+        names = self.get_area_names()
+        return {names.get(int(code), str(code)): float(total) for code, total in zip(code_values, totals)}
+
+    # Returns (area codes, grid[day, area]) for local days first_date to last_date, split at midnight
+    def daily_area_seconds(self, first_date, last_date):
+        return Aggregation.daily_area_seconds(*self.arrays(), first_date, last_date)
+
+    #------------------------------------------------------------------------------------------------------
+    # Mirroring a log store, so its recent days are answered without reading the log again
+    #------------------------------------------------------------------------------------------------------
+    # Replaces the contents with log_store's entries from first_date to last_date. Entries are indexed by
+    # the date they started, so the day before is read too for ones crossing midnight.
+    def load(self, log_store, first_date, last_date):
+        self._area_codes = log_store.get_area_codes()
+        self.clear()
+        self.extend(*log_store.read_arrays_between(first_date - datetime.timedelta(days=1), last_date))
+        self._source = (log_store.get_log_file(), first_date, log_store.get_version())
+
+    # True if this still holds every entry log_store has from first_date on: nothing but write_through()
+    # has written to the log since load()
+    def is_current(self, log_store, first_date):
+        if self._source is None or self._source[0] != log_store.get_log_file():
+            return False
+        return (self._source[1] <= first_date and self._source[2] == log_store.get_version()
+                and self.covers(Aggregation.day_edges(first_date, first_date)[0]))
+
+    # Appends an interval to log_store and keeps it here as well
+    def write_through(self, log_store, area_name, start_time, stop_time):
+        current = self._source is not None and self._source[2] == log_store.get_version()
+        log_store.append(area_name, start_time, stop_time)
+        self.append(area_name, start_time, stop_time)
+        if current:
+            self._source = self._source[:2] + (log_store.get_version(),)
+
+def _allocate(size):
+    return array.array("d", bytes(8 * size)), array.array("d", bytes(8 * size)), array.array("h", bytes(2 * size))
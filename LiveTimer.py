@@ -0,0 +1,54 @@
+import html
+import time
+import streamlit as st
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+timer_label = "Time Elapsed"
+
+#----------------------------------------------------------------------------------------------------------
+# Formats the time since start_time as HH:MM:SS (00:00:00 when not logging)
+#----------------------------------------------------------------------------------------------------------
+def format_elapsed(start_time):
+    if start_time:
+        elapsed = int(time.time() - start_time)
+        return time.strftime("%H:%M:%S", time.gmtime(elapsed))
+    return "00:00:00"
+
+#----------------------------------------------------------------------------------------------------------
+# Server-side timer: the app reruns this every second inside an st.fragment
+#----------------------------------------------------------------------------------------------------------
+def server_timer(start_time):
+    st.metric(timer_label, format_elapsed(start_time))
+
+#----------------------------------------------------------------------------------------------------------
+# Client-side timer: sent once per state change, then ticks in the browser
+#----------------------------------------------------------------------------------------------------------
+def client_timer(start_time):
+    st.html(timer_html(start_time), unsafe_allow_javascript=True)
+
+def timer_html(start_time):
+    start_ms = int((start_time or 0) * 1000)
+    element_id = f"live-timer-{start_ms}"
+    # The server's clock is sent along so a skewed browser clock doesn't shift the timer
+    return f"""
+<div style="font-size: 0.875rem;">{html.escape(timer_label)}</div>
+<div id="{element_id}" style="font-size: 2.25rem; line-height: 1.6;">{format_elapsed(start_time)}</div>
+<script>
+  (() => {{
+    const startMs = {start_ms};
+    const skewMs = Date.now() - {int(time.time() * 1000)};
+    const pad = (n) => String(n).padStart(2, "0");
+    // A rerun replaces the element, so drop the interval left by the previous render
+    clearInterval(window.liveTimerInterval);
+    if (!startMs) return;
+    window.liveTimerInterval = setInterval(() => {{
+      const element = document.getElementById("{element_id}");
+      if (!element) return;
+      const elapsed = Math.max(0, Math.floor((Date.now() - skewMs - startMs) / 1000)) % 86400;
+      element.textContent = pad(Math.floor(elapsed / 3600)) + ":" + pad(Math.floor(elapsed / 60) % 60) + ":" + pad(elapsed % 60);
+    }}, 1000);
+  }})();
+</script>
+"""
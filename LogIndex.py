@@ -0,0 +1,328 @@
+import json
+import os
+import threading
+import FileLock
+import Profiler
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+# Number of leading bytes used to detect a log that was rewritten rather than appended to
+head_size = 64
+
+# Bytes read at a time when streaming ranges of the log
+chunk_size = 1 << 20
+
+# A follower's journal is folded into a new snapshot once it outgrows the snapshot and this many bytes
+journal_min_size = 64 << 10
+
+months = {b"Jan": 1, b"Feb": 2, b"Mar": 3, b"Apr": 4, b"May": 5, b"Jun": 6,
+          b"Jul": 7, b"Aug": 8, b"Sep": 9, b"Oct": 10, b"Nov": 11, b"Dec": 12}
+
+#----------------------------------------------------------------------------------------------------------
+# Returns the ISO date of a CSV row's Entry Time, or None for headers and damaged rows
+#----------------------------------------------------------------------------------------------------------
+# Rows are split from the right since area names may contain commas. Rows written for a user carry it in
+# a fifth column, after the duration.
+def csv_row_date(line):
+    line = line.rstrip(b"\r\n")
+    parts = line.rsplit(b",", 4)
+    if len(parts) == 5 and ctime_date(parts[3]) is None:
+        return ctime_date(parts[1])
+    parts = line.rsplit(b",", 3)
+    if len(parts) != 4:
+        return None
+    return ctime_date(parts[1])
+
+def ctime_date(field):
+    # ctime format: "Sat Oct  4 12:00:00 2025"
+    fields = field.split()
+    if len(fields) != 5 or fields[1] not in months or not fields[2].isdigit() or not fields[4].isdigit():
+        return None
+    return f"{int(fields[4]):04d}-{months[fields[1]]:02d}-{int(fields[2]):02d}"
+
+#----------------------------------------------------------------------------------------------------------
+# Splits CSV bytes into runs of consecutive rows that share a date
+#----------------------------------------------------------------------------------------------------------
+# Returns ([[date, start, end], ...], bytes consumed). A partially written last row is left for later.
+def scan_csv_bytes(data):
+    end = data.rfind(b"\n") + 1
+    runs = []
+    pos = 0
+    for line in data[:end].splitlines(keepends=True):
+        date = csv_row_date(line)
+        if date is not None:
+            if runs and runs[-1][0] == date and runs[-1][2] == pos:
+                runs[-1][2] = pos + len(line)
+            else:
+                runs.append([date, pos, pos + len(line)])
+        pos += len(line)
+    return runs, end
+
+#----------------------------------------------------------------------------------------------------------
+# LogFollower Base Class
+#----------------------------------------------------------------------------------------------------------
+# Follows an append-only log and keeps derived state in a JSON file next to it. Each refresh hands only
+# the bytes appended since the last one to _consume(); a truncated, rewritten or replaced log starts over.
+# With state_file=None the state lives in memory only and is rebuilt from the log on first refresh.
+# Given an archive, every archived segment is also fed to _consume() whenever the state starts over.
+#
+# The state file is a snapshot. After a refresh, only the entries _delta() reports as changed are appended
+# to <state_file>.journal, so saving costs the size of the change rather than of the whole state. Each
+# journal line holds the new values of the changed entries and the log sizes it goes from and to. Loading
+# replays the lines that continue from the state reached so far, so lines from other processes sharing the
+# files, or left over from before a snapshot, are skipped rather than applied twice. The journal is folded
+# into a new snapshot once it outgrows it.
+class LogFollower:
+    # Profiler span recorded around refresh()
+    span_name = "follower.refresh"
+
+    def __init__(self, log_file, state_file, archive=None):
+        self._log_file = log_file
+        self._state_file = state_file
+        self._journal_file = None if state_file is None else state_file + ".journal"
+        self._archive = archive
+        self._inode = None
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._reset()
+        self._load()
+
+    def _reset(self):
+        # Anything read at byte offsets of the old state is stale once this changes
+        self._generation += 1
+        self._size = 0
+        self._head = b""
+        self._seeded = self._archive is None
+        self._restore({})
+        # Starting over invalidates the journal, so the next save writes a snapshot
+        self._saved_size = None
+        self._snapshot_bytes = 0
+
+    def _load(self):
+        if self._state_file is None:
+            return
+        try:
+            with open(self._state_file, mode="r") as file:
+                saved = json.load(file)
+            self._size = saved["size"]
+            self._head = bytes.fromhex(saved["head"])
+            self._inode = saved.get("inode")
+            self._restore(saved)
+            self._seeded = True
+            self._snapshot_bytes = os.path.getsize(self._state_file)
+        except (OSError, ValueError, KeyError):
+            self._reset()
+            return
+        self._replay()
+        self._saved_size = self._size
+
+    def _replay(self):
+        try:
+            with open(self._journal_file, mode="r") as file:
+                lines = file.readlines()
+        except OSError:
+            return
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                head = bytes.fromhex(entry["head"])
+                if entry["inode"] != self._inode or head[:len(self._head)] != self._head[:len(head)]:
+                    continue
+                if entry["from"] <= self._size < entry["size"]:
+                    self._apply(entry["delta"])
+                    self._size = entry["size"]
+                    self._head = head
+            except (ValueError, KeyError, TypeError):
+                # A line cut short by a crash, or not ours to apply
+                continue
+
+    def _save(self):
+        if self._state_file is None:
+            return
+        delta = self._delta()
+        if self._saved_size is None:
+            self._save_snapshot()
+            return
+        line = json.dumps({"from": self._saved_size, "size": self._size, "head": self._head.hex(),
+                           "inode": self._inode, "delta": delta}) + "\n"
+        with open(self._journal_file, mode="ab") as file:
+            with FileLock.locked(file):
+                file.write(line.encode())
+                journal_size = file.tell()
+        self._saved_size = self._size
+        if journal_size > max(journal_min_size, self._snapshot_bytes):
+            self._save_snapshot()
+
+    def _save_snapshot(self):
+        tmp_file = f"{self._state_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, mode="w") as file:
+            json.dump({"size": self._size, "head": self._head.hex(), "inode": self._inode, **self._state()}, file)
+            self._snapshot_bytes = file.tell()
+        os.replace(tmp_file, self._state_file)
+        # Lines appended meanwhile by another process are lost with the rest; they only save work on load
+        with open(self._journal_file, mode="wb"):
+            pass
+        self._saved_size = self._size
+
+    def _seed(self):
+        if not self._seeded:
+            for data in self._archive.iter_bytes():
+                self._consume(data, None)
+            self._seeded = True
+
+    # Getters
+    def get_log_file(self):
+        return self._log_file
+
+    def get_inode(self):
+        return self._inode
+
+    def get_generation(self):
+        return self._generation
+
+    # Processes any bytes appended since the last refresh
+    def refresh(self):
+        with Profiler.span(self.span_name), self._lock:
+            try:
+                stat = os.stat(self._log_file)
+            except FileNotFoundError:
+                if self._size or self._head:
+                    self._reset()
+                self._seed()
+                return
+            # Compaction swaps in a new file, so a new inode always means starting over
+            if stat.st_ino != self._inode:
+                self._reset()
+                self._inode = stat.st_ino
+            self._seed()
+            size = stat.st_size
+            if size == self._size and self._head:
+                return
+
+            with open(self._log_file, mode="rb") as file:
+                head = file.read(head_size)
+                if size < self._size or head[:len(self._head)] != self._head:
+                    self._reset()
+                    self._seed()
+                if size <= self._size:
+                    return
+                file.seek(self._size)
+                data = file.read(size - self._size)
+
+            self._size += self._consume(data, self._size)
+            self._head = head
+            self._save()
+
+    # Drops the saved state and processes the whole log again
+    def rebuild(self):
+        with self._lock:
+            self._reset()
+        self.refresh()
+
+    # Subclasses implement these
+    def _restore(self, saved):
+        raise NotImplementedError
+
+    def _state(self):
+        raise NotImplementedError
+
+    # Returns the entries of _state() changed since the last call, in a form _apply() takes back
+    def _delta(self):
+        raise NotImplementedError
+
+    def _apply(self, delta):
+        raise NotImplementedError
+
+    def _consume(self, data, offset):
+        raise NotImplementedError
+
+#----------------------------------------------------------------------------------------------------------
+# LogIndex Class
+#----------------------------------------------------------------------------------------------------------
+# Maps each date to the byte ranges of the log that hold its entries, so only new bytes are ever scanned.
+class LogIndex(LogFollower):
+    span_name = "index.refresh"
+
+    def __init__(self, log_file, scanner=scan_csv_bytes):
+        self._scanner = scanner
+        super().__init__(log_file, log_file + ".idx.json")
+
+    def _restore(self, saved):
+        self._dates = saved.get("dates", {})
+        self._changed = set()
+
+    def _state(self):
+        return {"dates": self._dates}
+
+    def _delta(self):
+        changed, self._changed = self._changed, set()
+        return {date: self._dates[date] for date in changed}
+
+    def _apply(self, delta):
+        self._dates.update(delta)
+
+    def _consume(self, data, offset):
+        runs, consumed = self._scanner(data)
+        for date, start, end in runs:
+            self._add(date, offset + start, offset + end)
+        return consumed
+
+    def get_dates(self):
+        with self._lock:
+            return sorted(self._dates)
+
+    def _add(self, date, start, end):
+        self._changed.add(date)
+        ranges = self._dates.setdefault(date, [])
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+
+    # Returns the merged byte ranges covering every date from first_date to last_date inclusive
+    def ranges_between(self, first_date, last_date):
+        first, last = str(first_date), str(last_date)
+        with self._lock:
+            ranges = sorted(r for date, date_ranges in self._dates.items() if first <= date <= last
+                            for r in date_ranges)
+        merged = []
+        for start, end in ranges:
+            if merged and merged[-1][1] == start:
+                merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        return tuple(merged)
+
+    # Reads the given byte ranges from the log
+    def read_ranges(self, ranges):
+        if not ranges:
+            return b""
+        chunks = []
+        with open(self._log_file, mode="rb") as file:
+            for start, end in ranges:
+                file.seek(start)
+                chunks.append(file.read(end - start))
+        return b"".join(chunks)
+
+    # Same, but yields the bytes in pieces of about chunk_size, each ending on a whole entry
+    def iter_ranges(self, ranges, chunk_size=chunk_size):
+        if not ranges:
+            return
+        with open(self._log_file, mode="rb") as file:
+            for start, end in ranges:
+                file.seek(start)
+                pending = b""
+                while start < end:
+                    piece = file.read(min(chunk_size, end - start))
+                    if not piece:
+                        break
+                    start += len(piece)
+                    data = pending + piece
+                    _, consumed = self._scanner(data)
+                    if consumed:
+                        yield data[:consumed]
+                    pending = data[consumed:]
+                # Ranges end on whole entries, so anything left is a damaged row the parser will skip
+                if pending:
+                    yield pending
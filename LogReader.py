@@ -0,0 +1,201 @@
+import csv
+import io
+import math
+import os
+import threading
+import time
+import numpy as np
+import Profiler
+# pandas is imported where frames are built, so the logging UI starts without loading it
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+csv_labels = ["Area", "Entry Time", "Exit Time", "Duration (seconds)"]
+
+# Logs opened for a user record it in an extra last column; older rows without one read as ""
+user_label = "User"
+user_csv_labels = csv_labels + [user_label]
+
+# Format written by time.ctime() in log_entry_exit()
+time_format = "%a %b %d %H:%M:%S %Y"
+
+# Number of leading bytes used to detect a file that was rewritten rather than appended to
+head_size = 64
+
+# Rows the parsed log has room for at first; the room doubles whenever it fills
+initial_capacity = 1024
+
+#----------------------------------------------------------------------------------------------------------
+# Parses raw CSV bytes into a log frame
+#----------------------------------------------------------------------------------------------------------
+def parse_log_bytes(data):
+    import pandas as pd
+    if not data:
+        return empty_frame()
+    with Profiler.span("parse.read_csv"):
+        df = pd.read_csv(io.BytesIO(data), header=None, names=user_csv_labels, dtype=str,
+                         skip_blank_lines=True, on_bad_lines="skip")
+        # The Tk app appends a header every time logging starts, so headers can appear mid-file
+        df = df[df["Area"] != csv_labels[0]]
+        df[user_label] = df[user_label].fillna("")
+    with Profiler.span("parse.to_datetime"):
+        df["Entry Time"] = pd.to_datetime(df["Entry Time"], format=time_format, errors="coerce")
+        df["Exit Time"] = pd.to_datetime(df["Exit Time"], format=time_format, errors="coerce")
+        df["Duration (seconds)"] = pd.to_numeric(df["Duration (seconds)"], errors="coerce")
+    df = df.dropna().reset_index(drop=True)
+    Profiler.count("bytes_read", len(data))
+    Profiler.count("rows_read", len(df))
+    return df
+
+# The same rows as (area names, start epochs, durations) lists, parsed line by line without pandas.
+# For the few rows an append adds this is quicker than building a frame.
+def parse_log_rows(data):
+    areas, starts, durations = [], [], []
+    for fields in csv.reader(io.StringIO(data.decode("utf-8", errors="replace"))):
+        if len(fields) not in (len(csv_labels), len(user_csv_labels)) or fields[0] in ("", csv_labels[0]):
+            continue
+        try:
+            entry = time.strptime(fields[1], time_format)
+            time.strptime(fields[2], time_format)
+            duration = float(fields[3])
+        except ValueError:
+            continue
+        if math.isnan(duration):
+            continue
+        areas.append(fields[0])
+        # Local wall-clock time; mktime resolves DST as to_epoch() does
+        starts.append(time.mktime(tuple(entry[:8]) + (-1,)))
+        durations.append(duration)
+    Profiler.count("bytes_read", len(data))
+    Profiler.count("rows_read", len(areas))
+    return areas, starts, durations
+
+def empty_frame():
+    import pandas as pd
+    return pd.DataFrame({
+        "Area": pd.Series(dtype=object),
+        "Entry Time": pd.Series(dtype="datetime64[ns]"),
+        "Exit Time": pd.Series(dtype="datetime64[ns]"),
+        "Duration (seconds)": pd.Series(dtype=float),
+        user_label: pd.Series(dtype=object),
+    })
+
+#----------------------------------------------------------------------------------------------------------
+# LogReader Class
+#----------------------------------------------------------------------------------------------------------
+# Keeps the parsed log in memory and only parses rows appended since the last read.
+# A full reload happens only when the file shrank, was replaced or its leading bytes changed.
+# Columns live in NumPy arrays with spare room at the end, so new rows are copied in rather than the
+# whole log concatenated again. Growing allocates new arrays, leaving frames already returned intact.
+class LogReader:
+    def __init__(self, log_file):
+        self._log_file = log_file
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # Built on first read
+        self._frame = None
+        self._columns = None
+        self._rows = 0
+        self._size = 0
+        self._mtime = 0
+        self._inode = None
+        self._offset = 0
+        self._head = b""
+
+    # Getters
+    def get_log_file(self):
+        return self._log_file
+
+    def get_offset(self):
+        return self._offset
+
+    # Returns the parsed log, parsing any rows appended since the last call
+    def read(self):
+        with self._lock:
+            try:
+                stat = os.stat(self._log_file)
+            except FileNotFoundError:
+                self._reset()
+                return empty_frame()
+
+            if stat.st_size == self._size and stat.st_mtime_ns == self._mtime and stat.st_ino == self._inode:
+                return self._frame
+
+            if self._was_rewritten(stat):
+                self._reset()
+
+            self._read_tail()
+            self._size = stat.st_size
+            self._mtime = stat.st_mtime_ns
+            self._inode = stat.st_ino
+            if self._frame is None:
+                self._frame = self._build_frame()
+            return self._frame
+
+    # Drops the cached frame so the next read parses the whole file
+    def invalidate(self):
+        with self._lock:
+            self._reset()
+
+    def _was_rewritten(self, stat):
+        if stat.st_size < self._offset:
+            return True
+        # A new file swapped in by compaction
+        if self._inode is not None and stat.st_ino != self._inode:
+            return True
+        # Same size but a new mtime means the file was replaced in place
+        if stat.st_size == self._size and stat.st_mtime_ns != self._mtime:
+            return True
+        if self._head:
+            with open(self._log_file, mode="rb") as file:
+                if file.read(len(self._head)) != self._head:
+                    return True
+        return False
+
+    def _read_tail(self):
+        with open(self._log_file, mode="rb") as file:
+            if not self._head:
+                self._head = file.read(head_size)
+            file.seek(self._offset)
+            data = file.read()
+
+        # Leave a partially written last row for the next read
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            return
+        new_rows = parse_log_bytes(data[:end])
+        self._offset += end
+        if not new_rows.empty:
+            self._append(new_rows)
+            self._frame = None
+
+    # Copies rows into the spare room at the end of the columns, reallocating them at twice the size when full
+    def _append(self, rows):
+        count = len(rows)
+        if self._columns is None or self._rows + count > len(self._columns["Area"]):
+            capacity = max(initial_capacity, 2 * (self._rows + count))
+            if self._columns is None:
+                # Text columns are kept as object arrays, the rest as parsed
+                dtypes = {label: rows[label].dtype if isinstance(rows[label].dtype, np.dtype) else np.dtype(object)
+                          for label in user_csv_labels}
+            else:
+                dtypes = {label: column.dtype for label, column in self._columns.items()}
+            columns = {label: np.empty(capacity, dtype=dtype) for label, dtype in dtypes.items()}
+            if self._columns is not None:
+                for label, column in columns.items():
+                    column[:self._rows] = self._columns[label][:self._rows]
+            self._columns = columns
+        for label, column in self._columns.items():
+            column[self._rows:self._rows + count] = rows[label].to_numpy(dtype=column.dtype)
+        self._rows += count
+
+    # A frame over the rows held so far, sharing the columns' memory
+    def _build_frame(self):
+        if self._columns is None:
+            return empty_frame()
+        import pandas as pd
+        return pd.DataFrame({label: pd.Series(column[:self._rows], dtype=column.dtype, copy=False)
+                             for label, column in self._columns.items()}, copy=False)
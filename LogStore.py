@@ -0,0 +1,671 @@
+import argparse
+import csv
+import io
+import json
+import os
+import threading
+import time
+import numpy as np
+import Aggregation
+import Archive
+import FileLock
+import IntervalIndex
+import LogIndex
+import LogReader
+import Profiler
+import Rollup
+# pandas is imported where frames are built, so the logging UI starts without loading it
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+csv_labels = LogReader.csv_labels
+user_label = LogReader.user_label
+
+# Fixed-width record written by BinaryLogStore: epoch start/stop and a small area code
+record_dtype = np.dtype([("start", "<f8"), ("stop", "<f8"), ("area", "<i2")])
+
+binary_extensions = (".bin", ".dat")
+
+# CSV chunks up to this size (a few appended rows) are parsed line by line rather than through pandas
+small_parse_size = 16 << 10
+
+# Number of date-range reads kept per store
+range_cache_size = 16
+
+#----------------------------------------------------------------------------------------------------------
+# Builds a {area name: code} table from an areas dict
+#----------------------------------------------------------------------------------------------------------
+# Accepts both the Tk layout ({num: name}) and the Streamlit layout ({num: (name, charge code)}).
+# The idle label always gets code 0.
+def build_area_codes(areas, idle_label=None):
+    area_codes = {}
+    if idle_label is not None:
+        area_codes[idle_label] = 0
+    for num, value in areas.items():
+        name = value[0] if isinstance(value, tuple) else value
+        area_codes.setdefault(name, num)
+    return area_codes
+
+#----------------------------------------------------------------------------------------------------------
+# Converts between epoch seconds and the naive local datetimes used by the log frame
+#----------------------------------------------------------------------------------------------------------
+def to_local_datetime(epochs):
+    import pandas as pd
+    epochs = np.asarray(epochs, dtype="f8")
+    if epochs.size == 0:
+        return pd.Series(dtype="datetime64[ns]")
+    local = np.round(epochs + Aggregation.utc_offsets(epochs))
+    return pd.Series(pd.to_datetime(local, unit="s"))
+
+def to_epoch(datetimes):
+    import pandas as pd
+    naive = np.asarray(pd.to_datetime(datetimes).astype("datetime64[s]").astype("i8"), dtype="f8")
+    if naive.size == 0:
+        return naive
+    hours, inverse = np.unique(np.floor(naive / 3600), return_inverse=True)
+    offsets = np.empty(len(hours), dtype="f8")
+    for i, h in enumerate(hours):
+        fields = time.gmtime(h * 3600)
+        # Interpret the wall-clock hour as local time and let mktime resolve DST
+        offsets[i] = h * 3600 - time.mktime(tuple(fields[:8]) + (-1,))
+    return naive - offsets[inverse]
+
+#----------------------------------------------------------------------------------------------------------
+# LogStore Base Class
+#----------------------------------------------------------------------------------------------------------
+# With a user, every row the store writes records that user.
+class LogStore:
+    def __init__(self, log_file, area_codes=None, user=None):
+        self._log_file = log_file
+        self._area_codes = dict(area_codes or {})
+        self._user = user
+        self._lock = threading.Lock()
+        self._archive = Archive.Archive(log_file, self.segment_extension)
+        self._index = LogIndex.LogIndex(log_file, self._scan_bytes)
+        self._rollup = Rollup.Rollup(log_file, self._scan_bytes, self._parse_arrays, self.get_area_names,
+                                     self._archive)
+        self._intervals = IntervalIndex.IntervalFollower(self._index, self._parse_arrays, self._archive)
+        self._range_cache = {}
+        self._archive_cache = {}
+
+    # Getters
+    def get_log_file(self):
+        return self._log_file
+
+    def get_area_codes(self):
+        return dict(self._area_codes)
+
+    def get_user(self):
+        return self._user
+
+    # codes, if given, are ones the caller is about to look up; see BinaryLogStore
+    def get_area_names(self, codes=()):
+        return {code: name for name, code in self._area_codes.items()}
+
+    # Per-day/week/month area totals, brought up to date on every append
+    def get_rollup(self):
+        return self._rollup
+
+    # Completed months moved out of the log by compact()
+    def get_archive(self):
+        return self._archive
+
+    def exists(self):
+        return os.path.exists(self._log_file)
+
+    # Changes whenever anything is written to the log or the archive, by this process or any other
+    def get_version(self):
+        try:
+            stat = os.stat(self._log_file)
+            log_version = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            log_version = None
+        return log_version, self._archive.get_version()
+
+    # Returns the code for an area name, assigning a new one if the name is unknown
+    def area_code(self, area_name):
+        area_name = str(area_name)
+        if area_name not in self._area_codes:
+            self._area_codes[area_name] = max(self._area_codes.values(), default=0) + 1
+        return self._area_codes[area_name]
+
+    def append(self, area_name, start_time, stop_time):
+        self.append_many([(area_name, start_time, stop_time)])
+
+    # Writes rows of (area name, start time, stop time) under an exclusive file lock
+    def append_many(self, rows, fsync=False):
+        with Profiler.span("store.append"):
+            data = self.format_rows(rows)
+            written = False
+            while not written:
+                with open(self._log_file, mode="ab") as file:
+                    with FileLock.locked(file, fsync):
+                        # compact() may have swapped in a new log while this waited for the lock
+                        if FileLock.is_current(file, self._log_file):
+                            file.write(data)
+                            written = True
+            Profiler.count("bytes_written", len(data))
+            Profiler.count("rows_written", len(rows))
+            self.refresh_rollup()
+
+    def refresh_rollup(self):
+        self._rollup.refresh()
+
+    # Brings the date index and rollups up to date with the log
+    def refresh(self):
+        self._index.refresh()
+        self._rollup.refresh()
+
+    # Returns the entries whose Entry Time falls between first_date and last_date inclusive.
+    # Only the byte ranges the date index points at, and the archived months overlapping the dates, are read.
+    def read_dates(self, first_date, last_date):
+        self._index.refresh()
+        ranges = self._index.ranges_between(first_date, last_date)
+        segments = self._archived_segments(first_date, last_date)
+        key = (str(first_date), str(last_date))
+        version = (ranges, self._index.get_inode(), self._archive.get_version())
+        # Sessions read through here concurrently, so the cache is only touched under the lock; parsing is
+        # done outside it
+        with self._lock:
+            cached = self._range_cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        frame = self._parse_bytes(self._index.read_ranges(ranges))
+        if segments:
+            import pandas as pd
+            lower, upper = pd.Timestamp(first_date), pd.Timestamp(last_date) + pd.Timedelta(days=1)
+            archived = [df[(df["Entry Time"] >= lower) & (df["Entry Time"] < upper)]
+                        for df in map(self._parse_bytes, self._archive.iter_bytes(segments))]
+            frame = pd.concat(archived + [frame], ignore_index=True)
+        with self._lock:
+            self._range_cache.pop(key, None)
+            if len(self._range_cache) >= range_cache_size:
+                self._range_cache.pop(next(iter(self._range_cache)))
+            self._range_cache[key] = (version, frame)
+        return frame
+
+    def read_day(self, date):
+        return self.read_dates(date, date)
+
+    # Returns {area name: seconds} logged within [t0, t1) epoch seconds, clipping entries at both ends.
+    # For ranges that don't start and end at midnight; only the days they touch are read.
+    def area_seconds(self, t0, t1):
+        totals = self._intervals.area_seconds(t0, t1)
+        names = self.get_area_names(totals)
+        return {names.get(code, str(code)): seconds for code, seconds in totals.items()}
+
+    # Same for the local days first_date to last_date inclusive (a day, week, pay period, ...), answered from
+    # the rollup's per-day totals without reading the log
+    def area_seconds_between(self, first_date, last_date):
+        return self._rollup.between(first_date, last_date)
+
+    # Returns (area codes, grid[day, area]) with entries split at midnight
+    def daily_area_seconds(self, first_date, last_date):
+        return self._intervals.daily_area_seconds(first_date, last_date)
+
+    # Same as read_dates() but returns (start, stop, area code) arrays
+    def read_arrays_between(self, first_date, last_date):
+        parts = list(self.iter_arrays_between(first_date, last_date, chunk_size=None))
+        return tuple(np.concatenate([part[i] for part in parts]) for i in range(3))
+
+    # Same, but yields the arrays a chunk at a time (or one per archived month) so memory stays flat
+    # however long the log is. chunk_size=None reads each byte range in one go. users=True adds each
+    # entry's user as a fourth array ("" where none was recorded).
+    def iter_arrays_between(self, first_date, last_date, chunk_size=LogIndex.chunk_size, users=False):
+        parse = self._parse_user_arrays if users else self._parse_arrays
+        edges = Aggregation.day_edges(first_date, last_date)
+        for data in self._archive.iter_bytes(self._archived_segments(first_date, last_date)):
+            arrays = parse(data)
+            keep = (arrays[0] >= edges[0]) & (arrays[0] < edges[-1])
+            yield tuple(array[keep] for array in arrays)
+
+        self._index.refresh()
+        ranges = self._index.ranges_between(first_date, last_date)
+        if chunk_size is None:
+            yield parse(self._index.read_ranges(ranges))
+            return
+        for data in self._index.iter_ranges(ranges, chunk_size):
+            yield parse(data)
+
+    # The whole logical log: archived months followed by the active file
+    def read_frame(self):
+        parts = [df for df in self._archived("frame") if not df.empty]
+        active = self._active_frame()
+        if not parts:
+            return active
+        import pandas as pd
+        return pd.concat(parts + [active], ignore_index=True)
+
+    def read_arrays(self):
+        archived = self._archived("arrays")
+        active = self._active_arrays()
+        if not archived:
+            return active
+        return tuple(np.concatenate([part[i] for part in archived + [active]]) for i in range(3))
+
+    # Parsed archive segments, kept until the archive changes
+    def _archived(self, kind):
+        version = self._archive.get_version()
+        with self._lock:
+            cached = self._archive_cache.get(kind)
+        if cached is None or cached[0] != version:
+            parse = self._parse_bytes if kind == "frame" else self._parse_arrays
+            cached = (version, [parse(data) for data in self._archive.iter_bytes()])
+            with self._lock:
+                self._archive_cache[kind] = cached
+        return cached[1]
+
+    def _archived_segments(self, first_date, last_date):
+        edges = Aggregation.day_edges(first_date, last_date)
+        return self._archive.segments_between(edges[0], edges[-1])
+
+    # Merges back-to-back entries in the same area, drops zero-length entries, duplicates and repeated
+    # headers, and moves every completed month into a compressed archive segment.
+    # Returns (entries before, entries left in the active log, months archived).
+    def compact(self, now=None):
+        if not self.exists():
+            return 0, 0, 0
+        current_month = Archive.local_months([time.time() if now is None else now])[0]
+        tmp_file = f"{self._log_file}.{os.getpid()}.tmp"
+        undo = None
+        with open(self._log_file, mode="ab") as handle:
+            with FileLock.locked(handle):
+                with open(self._log_file, mode="rb") as file:
+                    original = file.read()
+                # Users are carried through, so a shared log keeps who logged each entry
+                start, stop, codes, users = self._parse_user_arrays(original)
+                before = len(start)
+                start, stop, codes, users = Archive.compact_arrays(start, stop, codes, users)
+                months = Archive.local_months(start)
+
+                segments = []
+                for month in np.unique(months[months < current_month]):
+                    rows = months == month
+                    month_arrays = (start[rows], stop[rows], codes[rows], users[rows])
+                    # Late entries for a month that is already archived are merged into its segment
+                    existing = self._archive.find(Archive.month_key(month))
+                    if existing is not None:
+                        archived = self._parse_user_arrays(self._archive.read_segment(existing))
+                        month_arrays = Archive.compact_arrays(
+                            *(np.concatenate(pair) for pair in zip(archived, month_arrays)))
+                    month_start, month_stop = month_arrays[:2]
+                    segments.append((Archive.month_key(month), self._format_arrays(*month_arrays),
+                                     len(month_start), month_start.min(), month_stop.max()))
+
+                keep = months >= current_month
+                data = self._format_arrays(start[keep], stop[keep], codes[keep], users[keep])
+                if data == original:
+                    return before, before, 0
+
+                with open(tmp_file, mode="wb") as file:
+                    file.write(data)
+                    file.flush()
+                    os.fsync(file.fileno())
+                undo = self._archive.write_segments(segments)
+                if os.name != "nt":
+                    self._swap(tmp_file, undo)
+        if os.name == "nt":
+            # Windows can't replace an open file, including the locked handle above
+            self._swap(tmp_file, undo)
+
+        with self._lock:
+            self._range_cache.clear()
+        self.refresh_rollup()
+        return before, int(keep.sum()), len(segments)
+
+    def _swap(self, tmp_file, undo):
+        try:
+            os.replace(tmp_file, self._log_file)
+        except OSError:
+            undo()
+            os.remove(tmp_file)
+            raise
+
+    # Subclasses implement these
+    def create(self):
+        raise NotImplementedError
+
+    # Returns rows of (area name, start time, stop time) encoded for this store's log file
+    def format_rows(self, rows):
+        raise NotImplementedError
+
+    # Encodes (start, stop, area code, user) arrays as a complete log file
+    def _format_arrays(self, start, stop, codes, users):
+        raise NotImplementedError
+
+    def _active_frame(self):
+        raise NotImplementedError
+
+    def _active_arrays(self):
+        raise NotImplementedError
+
+    def _scan_bytes(self, data):
+        raise NotImplementedError
+
+    def _parse_bytes(self, data):
+        raise NotImplementedError
+
+    def _parse_arrays(self, data):
+        raise NotImplementedError
+
+    # Same as _parse_arrays() plus each entry's user ("" where none was recorded)
+    def _parse_user_arrays(self, data):
+        raise NotImplementedError
+
+#----------------------------------------------------------------------------------------------------------
+# CSV Backend (ctime strings, readable in Excel)
+#----------------------------------------------------------------------------------------------------------
+class CsvLogStore(LogStore):
+    segment_extension = ".csv"
+
+    def __init__(self, log_file, area_codes=None, user=None):
+        super().__init__(log_file, area_codes, user)
+        self._reader = LogReader.LogReader(log_file)
+
+    # Create CSV header if file doesn't exist
+    def create(self):
+        with self._lock:
+            if not os.path.exists(self._log_file):
+                with open(self._log_file, mode="wb") as file:
+                    file.write(self._file_header())
+
+    def _file_header(self):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(csv_labels if self._user is None else LogReader.user_csv_labels)
+        return buffer.getvalue().encode()
+
+    def format_rows(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        user_field = [] if self._user is None else [self._user]
+        for area_name, start_time, stop_time in rows:
+            writer.writerow([
+                area_name,
+                time.ctime(start_time),
+                time.ctime(stop_time),
+                round(stop_time - start_time, 2)
+            ] + user_field)
+        return buffer.getvalue().encode()
+
+    # Rows keep the user they were logged with; rows logged without one stay without one
+    def _format_arrays(self, start, stop, codes, users):
+        names = self.get_area_names()
+        users = [str(user or "") for user in users]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(csv_labels if self._user is None and not any(users) else LogReader.user_csv_labels)
+        for start_time, stop_time, code, user in zip(start.tolist(), stop.tolist(), codes.tolist(), users):
+            writer.writerow([
+                names.get(code, str(code)),
+                time.ctime(start_time),
+                time.ctime(stop_time),
+                round(stop_time - start_time, 2)
+            ] + ([user] if user else []))
+        return buffer.getvalue().encode()
+
+    def _active_frame(self):
+        return self._reader.read()
+
+    def _active_arrays(self):
+        return self._frame_arrays(self._active_frame())
+
+    # ctime strings drop fractions of a second, so stop is rebuilt from the logged duration
+    def _frame_arrays(self, df):
+        import pandas as pd
+        labels, names = pd.factorize(df["Area"])
+        with self._lock:
+            lookup = np.array([self.area_code(name) for name in names], dtype="i2")
+        codes = lookup[labels] if len(labels) else np.empty(0, dtype="i2")
+        start = to_epoch(df["Entry Time"])
+        return start, start + df["Duration (seconds)"].to_numpy(dtype="f8"), codes
+
+    def _scan_bytes(self, data):
+        return LogIndex.scan_csv_bytes(data)
+
+    def _parse_bytes(self, data):
+        return LogReader.parse_log_bytes(data)
+
+    def _parse_arrays(self, data):
+        if len(data) > small_parse_size:
+            return self._frame_arrays(self._parse_bytes(data))
+        areas, starts, durations = LogReader.parse_log_rows(data)
+        with self._lock:
+            codes = np.array([self.area_code(area) for area in areas], dtype="i2")
+        start = np.array(starts, dtype="f8")
+        return start, start + np.array(durations, dtype="f8"), codes
+
+    def _parse_user_arrays(self, data):
+        df = self._parse_bytes(data)
+        return self._frame_arrays(df) + (df[user_label].to_numpy(dtype=object),)
+
+#----------------------------------------------------------------------------------------------------------
+# Binary Backend (fixed-width records, memory-mappable)
+#----------------------------------------------------------------------------------------------------------
+# Records are appended as record_dtype; area names live in a small JSON table next to the log.
+# Records stay fixed-width, so the user is the store's own rather than saved with each record.
+# Other processes sharing the log (the Tk and Streamlit apps list different areas) may add names, so the
+# table is read again whenever the file changes or a record carries a code this store doesn't know.
+class BinaryLogStore(LogStore):
+    segment_extension = ".bin"
+
+    def __init__(self, log_file, area_codes=None, user=None):
+        super().__init__(log_file, area_codes, user)
+        self._names_file = log_file + ".areas.json"
+        self._names_version = None
+        self._records = np.empty(0, dtype=record_dtype)
+        self._records_inode = None
+        self._frame = None
+        self._load_names()
+
+    def get_area_names(self, codes=()):
+        self._refresh_names()
+        names = super().get_area_names()
+        if any(int(code) not in names for code in codes):
+            self._load_names()
+            names = super().get_area_names()
+        return names
+
+    def _refresh_names(self):
+        try:
+            stat = os.stat(self._names_file)
+        except FileNotFoundError:
+            return
+        if (stat.st_ino, stat.st_size, stat.st_mtime_ns) != self._names_version:
+            self._load_names()
+
+    def _load_names(self):
+        try:
+            stat = os.stat(self._names_file)
+            with open(self._names_file, mode="r") as file:
+                saved = json.load(file)
+        except FileNotFoundError:
+            return
+        # Saved codes win so existing records keep their meaning. The table is built aside and swapped
+        # in, so readers on other threads never see it half-merged.
+        area_codes = dict(saved)
+        taken = set(saved.values())
+        for name, code in self._area_codes.items():
+            if name not in area_codes and code not in taken:
+                area_codes[name] = code
+                taken.add(code)
+        self._area_codes = area_codes
+        self._names_version = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _save_names(self):
+        tmp_file = f"{self._names_file}.{os.getpid()}.tmp"
+        with open(tmp_file, mode="w") as file:
+            json.dump(self._area_codes, file, indent=2)
+        os.replace(tmp_file, self._names_file)
+        stat = os.stat(self._names_file)
+        self._names_version = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def create(self):
+        with self._lock:
+            if not os.path.exists(self._log_file):
+                open(self._log_file, mode="wb").close()
+                self._save_names()
+
+    def format_rows(self, rows):
+        with self._lock:
+            unknown = {str(row[0]) for row in rows} - set(self._area_codes)
+            if unknown:
+                # Pick up names other processes have added before assigning new codes
+                self._load_names()
+            records = np.empty(len(rows), dtype=record_dtype)
+            for i, (area_name, start_time, stop_time) in enumerate(rows):
+                records[i] = (start_time, stop_time, self.area_code(area_name))
+            # New names are saved before any record that uses them is written
+            if unknown or not os.path.exists(self._names_file):
+                self._save_names()
+        return records.tobytes()
+
+    # Returns the records as a structured array, reading only records appended since the last call
+    def read_records(self):
+        with self._lock:
+            try:
+                stat = os.stat(self._log_file)
+            except FileNotFoundError:
+                self._records = np.empty(0, dtype=record_dtype)
+                self._frame = None
+                return self._records
+
+            count = stat.st_size // record_dtype.itemsize
+            # A shorter log, or a new file swapped in by compact(), is read from the start
+            if count < len(self._records) or stat.st_ino != self._records_inode:
+                self._records = np.empty(0, dtype=record_dtype)
+                self._records_inode = stat.st_ino
+                self._frame = None
+            if count > len(self._records):
+                mapped = np.memmap(self._log_file, dtype=record_dtype, mode="r", shape=(count,))
+                new_records = np.array(mapped[len(self._records):])
+                del mapped
+                self._records = np.concatenate([self._records, new_records])
+                Profiler.count("rows_read", len(new_records))
+                self._frame = None
+            return self._records
+
+    # Records have no user field; the whole log is the store's user's
+    def _format_arrays(self, start, stop, codes, users):
+        records = np.empty(len(start), dtype=record_dtype)
+        records["start"] = start
+        records["stop"] = stop
+        records["area"] = codes
+        return records.tobytes()
+
+    def _active_arrays(self):
+        records = self.read_records()
+        return records["start"], records["stop"], records["area"]
+
+    def _active_frame(self):
+        records = self.read_records()
+        if self._frame is None:
+            self._frame = self._records_frame(records)
+        return self._frame
+
+    def _records_frame(self, records):
+        import pandas as pd
+        codes, code_index = np.unique(records["area"], return_inverse=True)
+        names = self.get_area_names(codes)
+        areas = np.array([names.get(int(code), str(code)) for code in codes], dtype=object)
+        return pd.DataFrame({
+            "Area": areas[code_index] if len(records) else np.empty(0, dtype=object),
+            "Entry Time": to_local_datetime(records["start"]),
+            "Exit Time": to_local_datetime(records["stop"]),
+            "Duration (seconds)": np.round(records["stop"] - records["start"], 2),
+            user_label: self._user or "",
+        })
+
+    def _scan_bytes(self, data):
+        count = len(data) // record_dtype.itemsize
+        records = np.frombuffer(data, dtype=record_dtype, count=count)
+        if count == 0:
+            return [], 0
+        days = Aggregation.local_days(records["start"])
+        breaks = np.flatnonzero(days[1:] != days[:-1]) + 1
+        starts = np.concatenate([[0], breaks])
+        ends = np.concatenate([breaks, [count]])
+        runs = [[str(Aggregation.day_date(days[first])), int(first) * record_dtype.itemsize,
+                 int(last) * record_dtype.itemsize] for first, last in zip(starts, ends)]
+        return runs, count * record_dtype.itemsize
+
+    def _parse_bytes(self, data):
+        count = len(data) // record_dtype.itemsize
+        Profiler.count("bytes_read", len(data))
+        Profiler.count("rows_read", count)
+        return self._records_frame(np.frombuffer(data, dtype=record_dtype, count=count))
+
+    def _parse_arrays(self, data):
+        records = np.frombuffer(data, dtype=record_dtype, count=len(data) // record_dtype.itemsize)
+        return records["start"], records["stop"], records["area"]
+
+    def _parse_user_arrays(self, data):
+        start, stop, codes = self._parse_arrays(data)
+        return start, stop, codes, np.full(len(start), self._user or "", dtype=object)
+
+#----------------------------------------------------------------------------------------------------------
+# Opens the store matching the log file's extension
+#----------------------------------------------------------------------------------------------------------
+# Pointing a frontend at a new binary log next to an existing CSV log migrates it once.
+def open_store(log_file, area_codes=None, user=None):
+    if os.path.splitext(log_file)[1].lower() not in binary_extensions:
+        return CsvLogStore(log_file, area_codes, user)
+
+    legacy_file = os.path.splitext(log_file)[0] + ".csv"
+    if not os.path.exists(log_file) and os.path.exists(legacy_file):
+        migrate_csv(legacy_file, log_file, area_codes)
+    return BinaryLogStore(log_file, area_codes, user)
+
+#----------------------------------------------------------------------------------------------------------
+# One-shot migration from area_log.csv to the binary backend
+#----------------------------------------------------------------------------------------------------------
+def migrate_csv(csv_file, binary_file, area_codes=None):
+    source = CsvLogStore(csv_file, area_codes)
+    start, stop, codes = source.read_arrays()
+
+    records = np.empty(len(start), dtype=record_dtype)
+    records["start"] = start
+    records["stop"] = stop
+    records["area"] = codes
+
+    # Write to a temporary file first so a failed migration never leaves a half-written log
+    tmp_file = binary_file + ".tmp"
+    records.tofile(tmp_file)
+    target = BinaryLogStore(binary_file, source.get_area_codes())
+    target._save_names()
+    os.replace(tmp_file, binary_file)
+    return len(records)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintenance commands for area logs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = commands.add_parser("migrate", help="migrate an area log CSV to the binary log format")
+    migrate_parser.add_argument("csv_file", nargs="?", default="area_log.csv")
+    migrate_parser.add_argument("binary_file", nargs="?", default="area_log.bin")
+
+    rollup_parser = commands.add_parser("rebuild-rollups", help="regenerate the daily/weekly/monthly rollups")
+    rollup_parser.add_argument("log_file", nargs="?", default="area_log.csv")
+
+    compact_parser = commands.add_parser("compact", help="merge and clean up entries and archive completed months")
+    compact_parser.add_argument("log_file", nargs="?", default="area_log.csv")
+
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        if os.path.exists(args.binary_file):
+            parser.error(f"'{args.binary_file}' already exists")
+        count = migrate_csv(args.csv_file, args.binary_file)
+        print(f"Migrated {count} entries from '{args.csv_file}' to '{args.binary_file}'.")
+    elif args.command == "rebuild-rollups":
+        if not os.path.exists(args.log_file):
+            parser.error(f"'{args.log_file}' does not exist")
+        open_store(args.log_file).get_rollup().rebuild()
+        print(f"Rebuilt rollups for '{args.log_file}'.")
+    elif args.command == "compact":
+        if not os.path.exists(args.log_file):
+            parser.error(f"'{args.log_file}' does not exist")
+        before, after, months = open_store(args.log_file).compact()
+        print(f"Compacted '{args.log_file}': {before} entries, {after} left in the log, "
+              f"{months} month(s) archived.")
@@ -0,0 +1,81 @@
+import math
+import threading
+import weakref
+import numpy as np
+import streamlit as st
+import Profiler
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+page_sizes = (25, 50, 100, 250)
+default_page_size = 50
+default_sort = "Entry Time"
+
+# Row orders per (areas shown, sort column, descending) for each frame still in use
+_orders = {}
+_orders_lock = threading.Lock()
+
+#----------------------------------------------------------------------------------------------------------
+# Returns the positions of df's rows in the areas given (all if empty), sorted by a column
+#----------------------------------------------------------------------------------------------------------
+# Dashboard frames are shared between sessions and replaced rather than changed, so each order is worked
+# out once per frame and dropped when the frame is.
+def row_order(df, areas, sort_by, descending):
+    key = (tuple(sorted(areas)), sort_by, descending)
+    with _orders_lock:
+        orders = _orders.get(id(df))
+        if orders is None:
+            orders = _orders[id(df)] = {}
+            weakref.finalize(df, _forget, id(df))
+        if key in orders:
+            return orders[key]
+
+    rows = np.flatnonzero(df["Area"].isin(areas).to_numpy()) if areas else np.arange(len(df))
+    order = rows[np.argsort(df[sort_by].to_numpy()[rows], kind="stable")]
+    if descending:
+        order = order[::-1]
+    with _orders_lock:
+        orders[key] = order
+    return order
+
+def _forget(frame_id):
+    with _orders_lock:
+        _orders.pop(frame_id, None)
+
+# Returns (rows on the page, rows matching the filter, page count); page numbers start at 1
+def log_page(df, areas=(), sort_by=default_sort, descending=False, page=1, page_size=default_page_size):
+    order = row_order(df, areas, sort_by, descending)
+    page_count = max(1, math.ceil(len(order) / page_size))
+    page = min(max(page, 1), page_count)
+    return df.iloc[order[(page - 1) * page_size:page * page_size]], len(order), page_count
+
+#----------------------------------------------------------------------------------------------------------
+# Log Entries table that pages, sorts and filters on the server and sends only the visible rows
+#----------------------------------------------------------------------------------------------------------
+# Runs as a fragment, so changing page, sort or filter reruns only the table.
+@st.fragment
+def log_table(df, key="log_table"):
+    col_areas, col_sort, col_order, col_size = st.columns([3, 2, 1, 1])
+    areas = col_areas.multiselect("Areas", sorted(df["Area"].unique()), key=f"{key}_areas",
+                                  placeholder="All areas")
+    sort_by = col_sort.selectbox("Sort by", list(df.columns), index=list(df.columns).index(default_sort),
+                                 key=f"{key}_sort")
+    descending = col_order.toggle("Descending", key=f"{key}_descending")
+    page_size = col_size.selectbox("Rows", page_sizes, index=page_sizes.index(default_page_size),
+                                   key=f"{key}_page_size")
+
+    with Profiler.span("dashboard.log_table"):
+        page_key = f"{key}_page"
+        # A narrower filter or bigger pages can leave the saved page past the end
+        last_page = max(1, math.ceil(len(row_order(df, areas, sort_by, descending)) / page_size))
+        if st.session_state.get(page_key, 1) > last_page:
+            st.session_state[page_key] = last_page
+        page = st.session_state.get(page_key, 1)
+        rows, total, page_count = log_page(df, areas, sort_by, descending, page, page_size)
+        st.dataframe(rows, width='stretch', hide_index=True)
+
+    col_page, col_count = st.columns([1, 3])
+    col_page.number_input("Page", min_value=1, max_value=page_count, step=1, key=page_key)
+    first_row = (page - 1) * page_size + 1 if total else 0
+    col_count.caption(f"Rows {first_row}-{first_row + len(rows) - 1 if total else 0} of {total}")
@@ -0,0 +1,171 @@
+import atexit
+import os
+import queue
+import threading
+import time
+import traceback
+import FileLock
+import Profiler
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+# Most rows written in one locked group commit
+max_batch_size = 500
+
+# Seconds to wait before retrying a failed write
+retry_delay = 0.5
+
+# Failed attempts before a batch is given up on, so close() cannot wait forever on a log it can't write
+max_retries = 20
+
+#----------------------------------------------------------------------------------------------------------
+# LogWriter Class
+#----------------------------------------------------------------------------------------------------------
+# Single writer for a log store. Callers queue rows from any thread; a background thread owns the file
+# handle and writes everything queued so far as one locked batch (group commit). on_commit(), if given, is
+# called on that thread after each batch is written.
+class LogWriter:
+    def __init__(self, log_store, fsync=False, on_commit=None):
+        self._log_store = log_store
+        self._fsync = fsync
+        self._on_commit = on_commit
+        self._queue = queue.Queue()
+        self._file = None
+        self._closed = False
+        self._rows_written = 0
+        self._batches_written = 0
+        self._rows_failed = 0
+        self._thread = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # Getters
+    def get_log_store(self):
+        return self._log_store
+
+    def get_rows_written(self):
+        return self._rows_written
+
+    def get_batches_written(self):
+        return self._batches_written
+
+    # Rows dropped after max_retries failed writes
+    def get_rows_failed(self):
+        return self._rows_failed
+
+    # Queues one row; returns immediately
+    def submit(self, area_name, start_time, stop_time):
+        if self._closed:
+            raise RuntimeError("LogWriter is closed")
+        self._queue.put((area_name, start_time, stop_time))
+
+    # Waits until every row queued before this call is on disk
+    def flush(self, timeout=10):
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    # Writes any queued rows and stops the background thread
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        rows = []
+        waiters = []
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            # Drain whatever else is already queued into the same batch
+            while True:
+                if item is None:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    rows.append(item)
+                if stopping or len(rows) >= max_batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            attempts = 0
+            while rows:
+                try:
+                    self._write(rows)
+                except Exception:
+                    traceback.print_exc()
+                    self._close_file()
+                    attempts += 1
+                    if attempts >= max_retries:
+                        print(f"LogWriter: gave up writing {len(rows)} row(s) to "
+                              f"'{self._log_store.get_log_file()}' after {attempts} attempts")
+                        self._rows_failed += len(rows)
+                        rows = []
+                    else:
+                        time.sleep(retry_delay)
+                else:
+                    # The rows are in the log from here on, so nothing below may send them back for a retry
+                    rows = []
+                    self._commit_done()
+
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+        self._close_file()
+
+    def _write(self, rows):
+        with Profiler.span("writer.commit"):
+            data = self._log_store.format_rows(rows)
+            written = False
+            while not written:
+                file = self._open_file()
+                with FileLock.locked(file, self._fsync):
+                    # Compaction may have swapped in a new log while this waited for the lock
+                    if FileLock.is_current(file, self._log_store.get_log_file()):
+                        file.write(data)
+                        written = True
+            self._rows_written += len(rows)
+            self._batches_written += 1
+            Profiler.count("bytes_written", len(data))
+            Profiler.count("rows_written", len(rows))
+
+    # Kept apart from _write() so a failing rollup save or callback never makes a written batch look unwritten.
+    # A rollup that failed to save catches up on the next refresh, since it follows the log.
+    def _commit_done(self):
+        for step in (self._log_store.refresh_rollup, self._on_commit):
+            if step is None:
+                continue
+            try:
+                step()
+            except Exception:
+                traceback.print_exc()
+
+    # Keeps one handle open, reopening it if the log was deleted or replaced
+    def _open_file(self):
+        path = self._log_store.get_log_file()
+        if self._file is not None:
+            try:
+                if os.stat(path).st_ino == os.fstat(self._file.fileno()).st_ino:
+                    return self._file
+            except FileNotFoundError:
+                pass
+            self._close_file()
+        self._file = open(path, mode="ab")
+        return self._file
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
@@ -0,0 +1,139 @@
+import bisect
+import collections
+import csv
+import io
+import json
+import threading
+import time
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+# Off by default; spans and counters cost a single flag check while disabled
+enabled = False
+
+# Most recent samples kept per span for percentiles and histograms
+window = 500
+
+# Histogram bucket upper bounds in seconds, and their labels
+bucket_edges = (0.001, 0.01, 0.1, 1.0)
+bucket_labels = ("<1ms", "1-10ms", "10-100ms", "100ms-1s", ">=1s")
+
+_lock = threading.Lock()
+_samples = {}
+_totals = {}
+_counters = {}
+
+#----------------------------------------------------------------------------------------------------------
+# Spans
+#----------------------------------------------------------------------------------------------------------
+class _Span:
+    __slots__ = ("_name", "_started")
+
+    def __init__(self, name):
+        self._name = name
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self._name, time.perf_counter() - self._started)
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_no_span = _NoSpan()
+
+# Times the with-block under name
+def span(name):
+    if not enabled:
+        return _no_span
+    return _Span(name)
+
+# For phases that don't fit a with-block: started = start() ... stop(name, started)
+def start():
+    return time.perf_counter() if enabled else None
+
+def stop(name, started):
+    if started is not None:
+        record(name, time.perf_counter() - started)
+
+def record(name, seconds):
+    with _lock:
+        if name not in _samples:
+            _samples[name] = collections.deque(maxlen=window)
+            _totals[name] = [0, 0.0]
+        _samples[name].append(seconds)
+        _totals[name][0] += 1
+        _totals[name][1] += seconds
+
+# Samples per bucket in an ascending list of durations
+def _histogram(recent):
+    below = [0] + [bisect.bisect_left(recent, edge) for edge in bucket_edges] + [len(recent)]
+    return [upper - lower for lower, upper in zip(below, below[1:])]
+
+#----------------------------------------------------------------------------------------------------------
+# Counters (rows read, bytes written, ...)
+#----------------------------------------------------------------------------------------------------------
+def count(name, amount=1):
+    if enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + amount
+
+#----------------------------------------------------------------------------------------------------------
+# Control and reporting
+#----------------------------------------------------------------------------------------------------------
+def enable(flag=True):
+    global enabled
+    enabled = flag
+
+def reset():
+    with _lock:
+        _samples.clear()
+        _totals.clear()
+        _counters.clear()
+
+# One row per span: call count and total/mean over all calls; percentiles and histogram over the recent window
+def span_summary():
+    with _lock:
+        rows = []
+        for name in sorted(_samples):
+            recent = sorted(_samples[name])
+            calls, total = _totals[name]
+            row = {
+                "span": name,
+                "calls": calls,
+                "total_ms": round(total * 1000, 3),
+                "mean_ms": round(total / calls * 1000, 3),
+                "p50_ms": round(recent[len(recent) // 2] * 1000, 3),
+                "p95_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 3),
+                "max_ms": round(recent[-1] * 1000, 3),
+            }
+            row.update(zip(bucket_labels, _histogram(recent)))
+            rows.append(row)
+        return rows
+
+def counter_summary():
+    with _lock:
+        return dict(sorted(_counters.items()))
+
+def to_json():
+    return json.dumps({"spans": span_summary(), "counters": counter_summary()}, indent=2)
+
+def to_csv():
+    buffer = io.StringIO()
+    fields = ["span", "calls", "total_ms", "mean_ms", "p50_ms", "p95_ms", "max_ms", *bucket_labels]
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+    writer.writeheader()
+    writer.writerows(span_summary())
+    for name, value in counter_summary().items():
+        writer.writerow({"span": f"counter:{name}", "calls": value})
+    return buffer.getvalue()
@@ -0,0 +1,43 @@
+import contextlib
+import threading
+
+#----------------------------------------------------------------------------------------------------------
+# RWLock Class
+#----------------------------------------------------------------------------------------------------------
+# Any number of readers at once, or a single writer. A waiting writer stops new readers from entering, so a
+# steady stream of dashboard reads cannot hold off an update forever.
+class RWLock:
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextlib.contextmanager
+    def read(self):
+        with self._condition:
+            while self._writer or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def write(self):
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
@@ -0,0 +1,135 @@
+import datetime
+import Aggregation
+import LogIndex
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+periods = ("day", "week", "month")
+
+# Bumped whenever the totals are computed differently, so older rollup files are rebuilt
+rollup_version = 2
+
+#----------------------------------------------------------------------------------------------------------
+# Rollup keys for a date
+#----------------------------------------------------------------------------------------------------------
+def day_key(date):
+    return str(date)
+
+def week_key(date):
+    year, week, _ = date.isocalendar()
+    return f"{year}-W{week:02d}"
+
+def month_key(date):
+    return f"{date.year:04d}-{date.month:02d}"
+
+def as_date(date):
+    if isinstance(date, str):
+        return datetime.date.fromisoformat(date)
+    if isinstance(date, datetime.datetime):
+        return date.date()
+    return date
+
+#----------------------------------------------------------------------------------------------------------
+# Rollup Class
+#----------------------------------------------------------------------------------------------------------
+# Seconds per area for every day, ISO week and month, saved next to the log and kept current as entries
+# are appended. Entries that run past midnight are split between the days they cover. Archived months are
+# counted whenever the totals are rebuilt. area_names(codes) returns the store's {code: name} table, making
+# sure it covers codes if the store can.
+class Rollup(LogIndex.LogFollower):
+    span_name = "rollup.refresh"
+
+    def __init__(self, log_file, scanner, parser, area_names, archive=None):
+        self._scanner = scanner
+        self._parser = parser
+        self._area_names = area_names
+        super().__init__(log_file, log_file + ".rollup.json", archive)
+
+    def _restore(self, saved):
+        if saved and saved.get("version") != rollup_version:
+            raise KeyError("version")
+        self._totals = {period: saved.get(period, {}) for period in periods}
+        self._changed = set()
+
+    def _state(self):
+        return {"version": rollup_version, **self._totals}
+
+    # Only the day, week and month touched by new entries, so an append saves a few keys, not every total
+    def _delta(self):
+        changed, self._changed = self._changed, set()
+        delta = {period: {} for period in periods}
+        for period, key in changed:
+            delta[period][key] = self._totals[period][key]
+        return delta
+
+    def _apply(self, delta):
+        for period in periods:
+            self._totals[period].update(delta.get(period, {}))
+
+    def _consume(self, data, offset):
+        _, consumed = self._scanner(data)
+        start, stop, codes = self._parser(data[:consumed])
+        if len(start) == 0:
+            return consumed
+
+        first_day = int(Aggregation.local_days(start).min())
+        last_day = int(Aggregation.local_days(stop).max())
+        edges = Aggregation.day_edges(Aggregation.day_date(first_day), Aggregation.day_date(last_day))
+        buckets, seconds, rows = Aggregation.split_at_edges(start, stop, edges)
+        days, area_codes, grid = Aggregation.bucket_area_seconds(first_day + buckets, codes[rows], seconds)
+        names = self._area_names(area_codes)
+        for day, row in zip(days, grid):
+            date = Aggregation.day_date(day)
+            keys = (("day", day_key(date)), ("week", week_key(date)), ("month", month_key(date)))
+            for code, total in zip(area_codes, row):
+                if total == 0:
+                    continue
+                area_name = names.get(int(code), str(code))
+                for period, key in keys:
+                    self._changed.add((period, key))
+                    area_totals = self._totals[period].setdefault(key, {})
+                    area_totals[area_name] = round(area_totals.get(area_name, 0.0) + float(total), 2)
+        return consumed
+
+    # Returns {area name: seconds} for the day, ISO week or month containing date
+    def totals(self, period, date):
+        date = as_date(date)
+        key = {"day": day_key, "week": week_key, "month": month_key}[period](date)
+        self.refresh()
+        with self._lock:
+            return dict(self._totals[period].get(key, {}))
+
+    def day_totals(self, date):
+        return self.totals("day", date)
+
+    def week_totals(self, date):
+        return self.totals("week", date)
+
+    def month_totals(self, date):
+        return self.totals("month", date)
+
+    # Returns {area name: seconds} for the days first_date to last_date inclusive. A single day, an ISO week
+    # or a calendar month is read straight from its totals; any other range adds up its days.
+    def between(self, first_date, last_date):
+        first_date, last_date = as_date(first_date), as_date(last_date)
+        if first_date == last_date:
+            return self.day_totals(first_date)
+        if first_date.weekday() == 0 and last_date - first_date == datetime.timedelta(days=6):
+            return self.week_totals(first_date)
+        next_month = (first_date.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+        if first_date.day == 1 and last_date == next_month - datetime.timedelta(days=1):
+            return self.month_totals(first_date)
+        totals = {}
+        for area_totals in self.days_between(first_date, last_date).values():
+            for area_name, seconds in area_totals.items():
+                totals[area_name] = round(totals.get(area_name, 0.0) + seconds, 2)
+        return totals
+
+    # Returns {date: {area name: seconds}} for every logged day from first_date to last_date inclusive
+    def days_between(self, first_date, last_date):
+        first, last = str(first_date), str(last_date)
+        self.refresh()
+        with self._lock:
+            return {datetime.date.fromisoformat(key): dict(area_totals)
+                    for key, area_totals in self._totals["day"].items() if first <= key <= last}
@@ -1,14 +1,15 @@
+import getpass
 import time
-import csv
 import tkinter as tk
 from tkinter import messagebox
 from tkinter import ttk  # For Scrollbar and styling
-from collections import defaultdict
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.dates import DateFormatter
 import datetime
 import TimePeriod
+import LogStore
+import TickScheduler
+import Checkpoint
+import IntervalLog
+# matplotlib is imported when the dashboard is first opened, so the area buttons appear without waiting for it
 
 #----------------------------------------------------------------------------------------------------------
 # GLOBALS
@@ -30,7 +31,15 @@ areas = {
 log_file = "area_log.csv"
 idle_label = "Untracked (Idle)"
 start_label = "Start Time"
+area_codes = LogStore.build_area_codes(areas, idle_label)
+# Each row records who logged it, for the team dashboard
+log_store = LogStore.open_store(log_file, area_codes, getpass.getuser())
 timePeriod1 = TimePeriod.TimePeriod()
+checkpoint = Checkpoint.Checkpoint(log_file)
+# The log may be shared with Streamlit sessions and other Tk apps, so this app's journal entry names it
+checkpoint_owner = Checkpoint.owner_id()
+# The week's closed intervals in memory; the dashboard only reads the log again when another app wrote to it
+history = IntervalLog.IntervalLog(area_codes)
 #----------------------------------------------------------------------------------------------------------
 
 #----------------------------------------------------------------------------------------------------------
@@ -38,10 +47,8 @@ timePeriod1 = TimePeriod.TimePeriod()
 #----------------------------------------------------------------------------------------------------------
 def log_entry_exit():
     if (timePeriod1.get_start_time() != timePeriod1.get_stop_time()):
-        duration = timePeriod1.get_stop_time() - timePeriod1.get_start_time()
-        with open(log_file, mode="a", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow([timePeriod1.get_area_name(), time.ctime(timePeriod1.get_start_time()), time.ctime(timePeriod1.get_stop_time()), round(duration, 2)])
+        history.write_through(log_store, timePeriod1.get_area_name(), timePeriod1.get_start_time(),
+                              timePeriod1.get_stop_time())
 #----------------------------------------------------------------------------------------------------------
 
 #----------------------------------------------------------------------------------------------------------
@@ -53,16 +60,21 @@ def switch_area(area_name):
         log_entry_exit()
         timePeriod1.set_area_name(area_name)
         timePeriod1.set_start_time(time.time())
+        checkpoint.save(timePeriod1, checkpoint_owner)
         update_display()
 #----------------------------------------------------------------------------------------------------------
 
 #----------------------------------------------------------------------------------------------------------
 # Updates the GUI with the current area and elapsed time
 #----------------------------------------------------------------------------------------------------------
+# Whole seconds, so the text (and the label) only changes once per tick
+def display_text():
+    elapsed = int(time.time() - timePeriod1.get_start_time())
+    return f"Current Area: {timePeriod1.get_area_name()}\nTime Spent: {elapsed} sec"
+
 def update_display():
-    elapsed = round(time.time() - timePeriod1.get_start_time(), 2)
-    label.config(text=f"Current Area: {timePeriod1.get_area_name()}\nTime Spent: {elapsed} sec")
-    root.after(1000, update_display)  # Refresh every second
+    # The shared ticker keeps a single one-second timer, however often this is called
+    ticker.start()
 #----------------------------------------------------------------------------------------------------------
 
 #----------------------------------------------------------------------------------------------------------
@@ -72,7 +84,8 @@ def exit_app():
     try:
         timePeriod1.set_stop_time(time.time())
         log_entry_exit()
-        messagebox.showinfo("Exit", "Logging stopped. Data saved to 'area_log.csv'.")
+        checkpoint.clear(checkpoint_owner)
+        messagebox.showinfo("Exit", f"Logging stopped. Data saved to '{log_file}'.")
     except NameError:
         messagebox.showinfo("Exit", "No logging session started. No data recorded.")
     except Exception as e:
@@ -89,29 +102,60 @@ def start_log():
         timePeriod1.set_start_time(time.time())
         timePeriod1.set_area_name(idle_label)
         update_display()
-        with open(log_file, mode="a", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow(["Area", "Entry Time", "Exit Time", "Duration (seconds)"])
+        log_store.create()
+        checkpoint.save(timePeriod1, checkpoint_owner)
     except Exception as e:
         messagebox.showerror("Error", f"Failed to start log: {e}")
         root.destroy()
 #----------------------------------------------------------------------------------------------------------
 
+#----------------------------------------------------------------------------------------------------------
+# Offers to resume or close periods left open by an app or session that stopped without "Exit"
+#----------------------------------------------------------------------------------------------------------
+# Periods held by running apps or live Streamlit sessions are left alone. Only one period can be resumed;
+# any others can be logged up to now and closed, or kept for next time.
+def recover_period():
+    # Only the checkpoints are read, so this costs the same however long the log is
+    for owner, orphan in checkpoint.orphans():
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(orphan.get_start_time()))
+        message = f"Logging was left open in '{orphan.get_area_name()}' since {started}."
+        if not timePeriod1.get_start_time():
+            if messagebox.askyesno("Resume Logging", f"{message}\n\nYes resumes it; No logs it up to now and "
+                                                     "closes it."):
+                # Whoever removes the entry takes the period, so another app can't log it as well
+                if checkpoint.clear(owner):
+                    timePeriod1.set_area_name(orphan.get_area_name())
+                    timePeriod1.set_start_time(orphan.get_start_time())
+                    checkpoint.save(timePeriod1, checkpoint_owner)
+                    update_display()
+                continue
+        elif not messagebox.askyesno("Close Logging", f"{message}\n\nLog it up to now and close it?"):
+            continue
+        if checkpoint.clear(owner):
+            history.write_through(log_store, orphan.get_area_name(), orphan.get_start_time(), time.time())
+#----------------------------------------------------------------------------------------------------------
+
 #----------------------------------------------------------------------------------------------------------
 # Displays dashboard to user
 #----------------------------------------------------------------------------------------------------------
 def show_dashboard():
-    # Read log data
-    activities = defaultdict(list)
-    with open(log_file, mode='r') as file:
-        reader = csv.reader(file)
-        next(reader)  # Skip the header
-        for row in reader:
-            if len(row) == 6:
-                area_name, entry_time, exit_time, duration, total_hours, department_code = row
-                entry_dt = datetime.datetime.strptime(entry_time, "%a %b %d %H:%M:%S %Y")
-                exit_dt = datetime.datetime.strptime(exit_time, "%a %b %d %H:%M:%S %Y")
-                activities[area_name].append((entry_dt, exit_dt, float(duration)))
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from matplotlib.dates import DateFormatter
+
+    today = datetime.date.today()
+    yesterday = today - datetime.timedelta(days=1)
+    start_of_week = today - datetime.timedelta(days=today.weekday())  # Start of the week (Monday)
+
+    # Seconds per (date, area); entries past midnight are split between days
+    first_date = min(yesterday, start_of_week)
+    if not history.is_current(log_store, first_date):
+        history.load(log_store, first_date, today)
+    area_codes, grid = history.daily_area_seconds(first_date, today)
+    dates = [first_date + datetime.timedelta(days=d) for d in range(len(grid))]
+    is_daily = [d == today or d == yesterday for d in dates]
+    is_weekly = [start_of_week <= d <= today for d in dates]
+    area_names = history.get_area_names()
 
     # Create a new window for the dashboard
     dashboard = tk.Toplevel(root)
@@ -122,31 +166,21 @@ def show_dashboard():
     fig, ax = plt.subplots(figsize=(10, 6))
 
     # Plot daily and weekly activity data
-    today = datetime.date.today()
-    yesterday = today - datetime.timedelta(days=1)
-    start_of_week = today - datetime.timedelta(days=today.weekday())  # Start of the week (Monday)
-    colors = plt.cm.get_cmap('tab20').colors
+    colors = plt.get_cmap('tab20').colors
     
-    for i, (area_name, entries) in enumerate(activities.items()):
-        daily_durations = defaultdict(float)
-        weekly_durations = defaultdict(float)
-        
-        for entry_dt, exit_dt, duration in entries:
-            entry_date = entry_dt.date()
-            if entry_date == today or entry_date == yesterday:
-                daily_durations[entry_date] += duration / 3600  # Convert to hours
-            if start_of_week <= entry_date <= today:
-                weekly_durations[entry_date] += duration / 3600  # Convert to hours
+    for i, code in enumerate(area_codes):
+        area_name = area_names.get(int(code), str(code))
+        hours = grid[:, i] / 3600  # Convert to hours
+        daily_durations = [(d, h) for d, h, shown in zip(dates, hours, is_daily) if shown and h > 0]
+        weekly_durations = [(d, h) for d, h, shown in zip(dates, hours, is_weekly) if shown and h > 0]
 
         if daily_durations:
-            dates = list(daily_durations.keys())
-            hours = list(daily_durations.values())
-            ax.bar(dates, hours, label=f"{area_name} (Daily)", color=colors[i % len(colors)])
+            dates_shown, hours_shown = zip(*daily_durations)
+            ax.bar(dates_shown, hours_shown, label=f"{area_name} (Daily)", color=colors[i % len(colors)])
 
         if weekly_durations:
-            weekly_dates = list(weekly_durations.keys())
-            weekly_hours = list(weekly_durations.values())
-            ax.bar(weekly_dates, weekly_hours, label=f"{area_name} (Weekly)", alpha=0.5, color=colors[i % len(colors)])
+            dates_shown, hours_shown = zip(*weekly_durations)
+            ax.bar(dates_shown, hours_shown, label=f"{area_name} (Weekly)", alpha=0.5, color=colors[i % len(colors)])
 
     # Format the x-axis for dates
     ax.xaxis.set_major_formatter(DateFormatter('%Y-%m-%d'))
@@ -190,6 +224,10 @@ scrollbar.pack(side="right", fill="y")
 label = tk.Label(root, text="Current Area: Untracked (Idle)\nTime Spent: 0 sec", font=("Arial", 14))
 label.pack(pady=10)
 
+# Single shared timer that refreshes the label every second
+ticker = TickScheduler.TickScheduler(root, interval=1000)
+ticker.subscribe(display_text, lambda text: label.config(text=text))
+
 # Buttons for each area inside the scrollable frame, displayed in a grid layout
 rows, cols = 5, 2  # Number of rows and columns for the grid
 for num, name in areas.items():
@@ -217,4 +255,7 @@ tk.Button(root, text="Show Dashboard", font=("Arial", 12), bg="blue", fg="white"
 # Exit button
 tk.Button(root, text="Exit", font=("Arial", 12), bg="red", fg="white", command=exit_app).pack(pady=10)
 
+# Pick up a period left open by a crash once the window is up
+root.after_idle(recover_period)
+
 root.mainloop()
\ No newline at end of file
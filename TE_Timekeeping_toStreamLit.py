@@ -1,10 +1,19 @@
 import streamlit as st
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import datetime
 import time
-import csv
-import matplotlib.pyplot as plt
-import pandas as pd
 import TimePeriod
-import os
+import LogStore
+import LogWriter
+import LiveTimer
+import Charts
+import Profiler
+import Checkpoint
+import AggregateStore
+import TeamRollup
+import LogTable
+# pandas and matplotlib are imported where the dashboard first needs them, so the controls come up first
 
 #----------------------------------------------------------------------------------------------------------
 # GLOBALS
@@ -38,35 +47,115 @@ area_colors = {
     "Untracked (Idle)": "#607D8B"           # Blue Grey
 }
 
-csv_labels = ["Area", "Entry Time", "Exit Time", "Duration (seconds)"]
+csv_labels = LogStore.csv_labels
 
+# Use a .bin file name to switch to the compact binary backend (an existing .csv log is migrated once).
+# Engineers who enter their name log to their own file next to it, e.g. area_log.<name>.csv.
 log_file = "area_log.csv"
 idle_label = "Untracked (Idle)"
+area_codes = LogStore.build_area_codes(areas, idle_label)
+
+# fsync every group commit; slower, but survives power loss
+log_fsync = False
+
+# "client" ticks the elapsed timer in the browser; "server" reruns a fragment every second
+timer_mode = "client"
+
+# "matplotlib" renders the pie chart to a cached PNG; "browser" draws it client-side with Vega-Lite
+chart_renderer = "matplotlib"
+
+# Seconds between checks for entries logged by other sessions. Each check reruns a fragment in every open tab,
+# so it is off by default (None): a tab then shows other sessions' entries on its next interaction, and idle
+# tabs cost the server nothing.
+dashboard_refresh = None
+
+# Times each rerun phase and shows the results in a sidebar "Diagnostics" expander
+show_diagnostics = False
+Profiler.enable(show_diagnostics)
+rerun_started = Profiler.start()
 
 # Initialize session state
 if "timePeriod1" not in st.session_state:
     st.session_state.timePeriod1 = TimePeriod.TimePeriod()
     st.session_state.timePeriod1.set_start_time(0)
-    selected_date = pd.Timestamp.now().date()
+    selected_date = datetime.date.today()
 
 if "elapsed_time" not in st.session_state:
     st.session_state.elapsed_time = 0
 
+#----------------------------------------------------------------------------------------------------------
+# Shared log store; reads are cached and only parse newly appended entries
+#----------------------------------------------------------------------------------------------------------
+@st.cache_resource
+def get_log_store(path, user=None):
+    return LogStore.open_store(path, area_codes, user)
+
+# Dashboard queries answered once per change to the log, shared by every session
+@st.cache_resource
+def get_aggregates(path, user=None):
+    return AggregateStore.AggregateStore(get_log_store(path, user))
+
+# One writer thread per log file, shared by every session; each commit updates the shared aggregates
+@st.cache_resource
+def get_log_writer(path, user=None):
+    return LogWriter.LogWriter(get_log_store(path, user), fsync=log_fsync,
+                               on_commit=get_aggregates(path, user).refresh)
+
+# Hours per engineer and area across every log, re-reading only the logs that changed
+@st.cache_resource
+def get_team_rollup(path):
+    return TeamRollup.TeamRollup(path, area_codes)
+
+# Returns (log file, user) for this session: the engineer's own log, or the shared one if no name is set
+def session_log():
+    user = st.session_state.get("user", "").strip()
+    return (TeamRollup.user_log_file(log_file, user), user) if user else (log_file, None)
+
+# Journal of the open period, so a period survives the browser session or the server dying
+@st.cache_resource
+def get_checkpoint(path):
+    return Checkpoint.Checkpoint(path, fsync=log_fsync)
+
+# Area/charge code reference table; it never changes, so it is built once per server
+@st.cache_resource
+def get_area_table():
+    import pandas as pd
+    area_data = [{"Area Name": v[0], "Charge Code": str(v[1]) if v[1] is not None else "-"} for k, v in areas.items()]
+    return pd.DataFrame(area_data)
+
+# Sessions share the log, so each checkpoint names the session that wrote it
+def get_session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+def get_session_owner():
+    return Checkpoint.owner_id(get_session_id())
+
+def is_active_session(session_id):
+    return session_id is not None and runtime.exists() and runtime.get_instance().is_active_session(session_id)
+
+# (owner, period) for the oldest period left open by a session or app that is gone (closed tab, restarted
+# server, crashed Tk app), or None. Periods that live sessions and apps hold open are never offered.
+def find_orphaned_period():
+    orphans = get_checkpoint(session_log()[0]).orphans(is_active_session)
+    return orphans[0] if orphans else None
+
 #----------------------------------------------------------------------------------------------------------
 # Logs entry and exit times to CSV
 #----------------------------------------------------------------------------------------------------------
 def log_entry_exit():
     time_period = st.session_state.timePeriod1
     if (time_period.get_start_time() != time_period.get_stop_time()):
-        duration = time_period.get_stop_time() - time_period.get_start_time()
-        with open(log_file, mode="a", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow([
-                time_period.get_area_name(), 
-                time.ctime(time_period.get_start_time()), 
-                time.ctime(time_period.get_stop_time()), 
-                round(duration, 2)
-            ])
+        with Profiler.span("log_entry_exit"):
+            log_writer = get_log_writer(*session_log())
+            log_writer.submit(
+                time_period.get_area_name(),
+                time_period.get_start_time(),
+                time_period.get_stop_time()
+            )
+            # Every caller reruns next, and nothing else reruns an idle tab, so the row must be in the log (and
+            # the shared aggregates) first. Rows other sessions queue meanwhile still go in the same batch.
+            log_writer.flush()
 
 #----------------------------------------------------------------------------------------------------------
 # Switches to a new area and logs time
@@ -75,10 +164,12 @@ def switch_area(area_name):
     time_period = st.session_state.timePeriod1
     if (time_period.get_start_time() != 0) or (time_period.get_area_name() == "None"):
         if area_name != time_period.get_area_name():
-            time_period.set_stop_time(time.time())
-            log_entry_exit()
-            time_period.set_area_name(area_name)
-            time_period.set_start_time(time.time())
+            with Profiler.span("switch_area"):
+                time_period.set_stop_time(time.time())
+                log_entry_exit()
+                time_period.set_area_name(area_name)
+                time_period.set_start_time(time.time())
+                get_checkpoint(session_log()[0]).save(time_period, get_session_owner())
 
 #----------------------------------------------------------------------------------------------------------
 # Starts logging
@@ -88,11 +179,9 @@ def start_log():
     time_period.set_start_time(time.time())
     time_period.set_area_name(idle_label)
     
-    # Create CSV header if file doesn't exist
-    if not os.path.exists(log_file):
-        with open(log_file, mode="w", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow(csv_labels)
+    # Create the log (CSV header) if it doesn't exist
+    get_log_store(*session_log()).create()
+    get_checkpoint(session_log()[0]).save(time_period, get_session_owner())
     
     st.success("Logging started!")
 
@@ -103,9 +192,53 @@ def stop_logging_session():
     time_period = st.session_state.timePeriod1
     time_period.set_stop_time(time.time())
     log_entry_exit()
+    get_checkpoint(session_log()[0]).clear(get_session_owner())
     time_period.set_start_time(0)
     time_period.set_area_name("None")
-    st.success("Logging stopped. Data saved to 'area_log.csv'.")
+    st.success(f"Logging stopped. Data saved to '{session_log()[0]}'.")
+
+#----------------------------------------------------------------------------------------------------------
+# Picks up a period left open by a crashed session, or logs it up to now and closes it
+#----------------------------------------------------------------------------------------------------------
+# Only the session whose clear() removes the orphan's entry acts on it, so two tabs never both take it
+def resume_orphaned_period():
+    owner, orphan = st.session_state.orphaned_period
+    checkpoint = get_checkpoint(session_log()[0])
+    if checkpoint.clear(owner):
+        time_period = st.session_state.timePeriod1
+        time_period.set_area_name(orphan.get_area_name())
+        time_period.set_start_time(orphan.get_start_time())
+        checkpoint.save(time_period, get_session_owner())
+    # Look again on the next rerun, in case another period was left open too
+    st.session_state.orphaned_log = None
+
+def close_orphaned_period():
+    owner, orphan = st.session_state.orphaned_period
+    if get_checkpoint(session_log()[0]).clear(owner):
+        orphan.set_stop_time(time.time())
+        log_writer = get_log_writer(*session_log())
+        log_writer.submit(orphan.get_area_name(), orphan.get_start_time(), orphan.get_stop_time())
+        log_writer.flush()
+    st.session_state.orphaned_log = None
+
+#----------------------------------------------------------------------------------------------------------
+# Shows per-phase timings and counters, with JSON/CSV export
+#----------------------------------------------------------------------------------------------------------
+def show_diagnostics_panel():
+    with st.sidebar.expander("Diagnostics"):
+        spans = Profiler.span_summary()
+        if spans:
+            st.dataframe(spans, width='stretch', hide_index=True)
+        else:
+            st.caption("No timings recorded yet.")
+        for name, value in Profiler.counter_summary().items():
+            st.text(f"{name}: {value:,}")
+        st.download_button("Export JSON", Profiler.to_json(), file_name="diagnostics.json",
+                           mime="application/json")
+        st.download_button("Export CSV", Profiler.to_csv(), file_name="diagnostics.csv", mime="text/csv")
+        if st.button("Reset Timings"):
+            Profiler.reset()
+            st.rerun()
 
 
 #----------------------------------------------------------------------------------------------------------
@@ -123,17 +256,14 @@ with col1:
     st.metric("Current Area", current_area)
 
 with col2:
-    @st.fragment(run_every=1)
-    def show_timer():
-        time_period = st.session_state.timePeriod1
-        if time_period.get_start_time():
-            elapsed = int(time.time() - time_period.get_start_time())
-            # Format as HH:MM:SS for a proper timer look
-            formatted_time = time.strftime("%H:%M:%S", time.gmtime(elapsed))
-            st.metric("Time Elapsed", formatted_time)
-        else:
-            st.metric("Time Elapsed", "00:00:00")
-    show_timer()
+    if timer_mode == "client":
+        # Idle tabs cause no reruns; the server is only contacted on real state changes
+        LiveTimer.client_timer(st.session_state.timePeriod1.get_start_time())
+    else:
+        @st.fragment(run_every=1)
+        def show_timer():
+            LiveTimer.server_timer(st.session_state.timePeriod1.get_start_time())
+        show_timer()
 
 # SIDEBAR CONTROLS
 with st.sidebar:
@@ -145,6 +275,33 @@ with st.sidebar:
     # Check if logging is currently active
     is_logging = st.session_state.timePeriod1.get_start_time() != 0
 
+    # The name picks this engineer's log; it is kept in the URL so a bookmark remembers it
+    if "user" not in st.session_state:
+        st.session_state.user = st.query_params.get("user", "")
+    st.text_input("Engineer", key="user", disabled=is_logging,
+                  help="Log to your own file; leave blank for the shared log")
+    if st.session_state.user.strip():
+        st.query_params["user"] = st.session_state.user.strip()
+    else:
+        st.query_params.pop("user", None)
+
+    # Offer to resume or close a period the last session left open. Only the checkpoint is read, so this
+    # costs the same however long the log is.
+    if st.session_state.get("orphaned_log") != session_log()[0]:
+        st.session_state.orphaned_period = find_orphaned_period()
+        st.session_state.orphaned_log = session_log()[0]
+    if st.session_state.orphaned_period is not None and not is_logging:
+        _, orphan = st.session_state.orphaned_period
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(orphan.get_start_time()))
+        st.warning(f"Logging was left open in '{orphan.get_area_name()}' since {started}.")
+        col_resume, col_close = st.columns(2)
+        if col_resume.button("Resume", width='content'):
+            resume_orphaned_period()
+            st.rerun()
+        if col_close.button("Close", width='content', help="Log the period up to now and stop"):
+            close_orphaned_period()
+            st.rerun()
+
     # Start Button
     if st.button("▶️ Start Logging", width='content', disabled=is_logging):
         start_log()
@@ -174,90 +331,96 @@ with st.sidebar:
                     switch_area(name[0])
                 st.rerun()
             
-# Display log file data and pie chart
-if os.path.exists(log_file):
-    df = pd.read_csv(log_file)
-    # Convert time strings to datetime
-    df['Entry Time'] = pd.to_datetime(df['Entry Time'])
-    df['Exit Time'] = pd.to_datetime(df['Exit Time'])
-
-    # Date Selection
-    st.divider()
-    
+# Each session subscribes to the shared aggregates of its log; this rerun reads the latest entries, so
+# earlier changes are already shown
+if st.session_state.get("aggregates_log") != session_log():
+    st.session_state.aggregates_changed = AggregateStore.ChangeFlag()
+    get_aggregates(*session_log()).subscribe(st.session_state.aggregates_changed.set)
+    st.session_state.aggregates_log = session_log()
+st.session_state.aggregates_changed.take()
+
+# Date Selection
+st.divider()
+
+# The dashboard is the only part of the page that needs pandas and matplotlib, so they are imported once a
+# session opens it rather than on every first visit
+if st.toggle("Show Dashboard", key="show_dashboard"):
     # Create columns to restrict width (1 part for date, 3 parts empty space)
     col_date, _ = st.columns([1, 3])
     with col_date:
-        selected_date = st.date_input("Select Date for Dashboard", value=pd.Timestamp.now().date())
+        today = datetime.date.today()
+        # Pick one day, or a start and end date for a week, pay period or any other range
+        selected_dates = st.date_input("Select Dates for Dashboard", value=(today, today))
+        # While a range is being picked only its first date is set
+        first_date, last_date = (selected_dates[0], selected_dates[-1]) if selected_dates else (today, today)
+
+    # Display log file data and pie chart
+    log_store = get_log_store(*session_log())
+    if log_store.exists():
+        # Read only the selected dates' entries through the date index, once for all sessions
+        aggregates = get_aggregates(*session_log())
+        with Profiler.span("dashboard.read_dates"):
+            df_date = aggregates.read_dates(first_date, last_date)
+
+        # Area totals from the rollup's per-day totals; entries crossing midnight count only their part
+        # inside the range
+        with Profiler.span("dashboard.area_totals"):
+            area_totals = tuple(sorted((area, round(seconds, 2)) for area, seconds in
+                                       aggregates.area_seconds_between(first_date, last_date).items()))
+
+        if area_totals:
+            st.subheader("Time Spent by Area")
+            with Profiler.span("dashboard.chart"):
+                if chart_renderer == "browser":
+                    st.vega_lite_chart(spec=Charts.pie_chart_spec(area_totals, area_colors), width='stretch')
+                else:
+                    # Cached per (totals, colors), so an unchanged day is not redrawn
+                    st.image(Charts.pie_chart_png(area_totals, tuple(area_colors.items())), width='stretch')
+
+        # Display Area Reference Table
+        st.subheader("View Area Details")
+        st.dataframe(get_area_table(), width='stretch', hide_index=True)
+
+        st.subheader("Log Entries")    
+        if not df_date.empty:
+            # Pages, sorts and filters on the server; only the visible rows are sent
+            LogTable.log_table(df_date)
+        else:
+            st.info("No entries for the dates selected yet.")
 
-    # Filter for selected date
-    df_date = df[df['Entry Time'].dt.date == selected_date]
-    
-    # Group by Area and sum duration
-    area_totals = df_date.groupby('Area')['Duration (seconds)'].sum().reset_index()
-    
-    if not area_totals.empty:
-        st.subheader("Time Spent by Area")
-        area_totals['Duration (Hrs)'] = (area_totals['Duration (seconds)'] / 3600).round(2)
-
-        # Calculate percentages for legend
-        total_seconds = area_totals['Duration (seconds)'].sum()
-        legend_labels = [f"{row['Area']} ({row['Duration (Hrs)']} hrs)" 
-                         for index, row in area_totals.iterrows()]
-
-        # Map colors to the areas present in the data
-        # Use a default gray if area name not found in map
-        pie_colors = [area_colors.get(x, "#808080") for x in area_totals['Area']]
-
-        # Create figure with dark background
-        fig, ax = plt.subplots(figsize=(10, 6))
-        dark_blue = '#1f2630' # Nice dark blue hex code
-        fig.patch.set_facecolor(dark_blue)
-        ax.set_facecolor(dark_blue)
-        
-        # Create pie chart
-        wedges, texts = ax.pie(
-            area_totals['Duration (seconds)'], 
-            labels=None,
-            startangle=90,
-            colors=pie_colors,
-            textprops=dict(color="white")
-        )
-        
-        # Set title to white
-        ax.set_title("Time Distribution", color='white')
-        
-        # Add Legend
-        legend = ax.legend(wedges, legend_labels, 
-                          title="Work Areas",
-                          loc="center left",
-                          bbox_to_anchor=(1, 0, 0.5, 1))
-        
-        # Style the legend for dark mode
-        plt.setp(legend.get_title(), color='white')
-        for text in legend.get_texts():
-            text.set_color("white")
-        legend.get_frame().set_facecolor(dark_blue)
-        legend.get_frame().set_edgecolor('white')
-        
-        # Equal aspect ratio ensures that pie is drawn as a circle
-        ax.axis('equal')
-            
-        plt.tight_layout()
-        st.pyplot(fig, width='stretch')
-    
-    # Display Area Reference Table
-    st.subheader("View Area Details")
-    # Convert areas dict to DataFrame
-    area_data = [{"Area Name": v[0], "Charge Code": str(v[1]) if v[1] is not None else "-"} for k, v in areas.items()]
-    df_areas = pd.DataFrame(area_data)
-    # Display with formatting
-    st.dataframe(df_areas, width='stretch', hide_index=True)
-    
-    st.subheader("Log Entries")    
-    if not df_date.empty:
-        st.dataframe(df_date, width='stretch')
     else:
-        st.info("No entries for day selected yet.")
-    
-else:
-    st.info("No log entries yet. Start logging to create entries.")
\ No newline at end of file
+        st.info("No log entries yet. Start logging to create entries.")
+
+    # Team view across every engineer's log, for leads
+    if st.toggle("Show Team Dashboard"):
+        st.subheader("Team Hours by Area")
+        with Profiler.span("dashboard.team"):
+            users, team_areas, grid = get_team_rollup(log_file).hours_table(first_date, last_date)
+        if users:
+            import pandas as pd
+            df_team = pd.DataFrame(grid.round(2), index=users, columns=team_areas)
+            df_team["Total"] = df_team.sum(axis=1).round(2)
+            st.dataframe(df_team, width='stretch')
+
+            # Factories are the areas with a charge code
+            st.subheader("Factory Utilization (hours)")
+            factories = [name for name, code in areas.values() if code is not None]
+            factory_hours = {name: round(float(df_team[name].sum()), 2) if name in df_team else 0.0
+                             for name in factories}
+            st.bar_chart(pd.Series(factory_hours, name="Hours"))
+        else:
+            st.info("No team entries for the dates selected yet.")
+
+# Opt-in: rerun when another session (or the Tk app) logs an entry. The check is two stat calls, and the
+# rerun reads results the shared aggregates already hold.
+if dashboard_refresh:
+    @st.fragment(run_every=dashboard_refresh)
+    def watch_log():
+        get_aggregates(*session_log()).refresh()
+        if st.session_state.aggregates_changed.take():
+            st.rerun()
+    watch_log()
+
+Profiler.stop("rerun", rerun_started)
+if show_diagnostics:
+    show_diagnostics_panel()
\ No newline at end of file
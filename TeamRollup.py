@@ -0,0 +1,156 @@
+import atexit
+import concurrent.futures
+import datetime
+import glob
+import multiprocessing
+import os
+import re
+import threading
+import numpy as np
+import Aggregation
+import LogStore
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+# Worker processes for aggregating team logs (None: one per CPU)
+max_workers = None
+
+# Reported for rows logged before users were recorded, in a log not named after its user
+unknown_user = "(unknown)"
+
+#----------------------------------------------------------------------------------------------------------
+# Per-user log files: area_log.csv -> area_log.<user>.csv
+#----------------------------------------------------------------------------------------------------------
+def user_log_file(log_file, user):
+    stem, extension = os.path.splitext(log_file)
+    safe_user = re.sub(r"[^\w-]", "_", user)
+    return f"{stem}.{safe_user}{extension}"
+
+# Returns {log file: user named in it} for the shared log_file and every per-user log next to it.
+# The shared log maps to None, since its rows may come from anyone.
+def team_log_files(log_file):
+    stem, extension = os.path.splitext(log_file)
+    log_files = {log_file: None} if os.path.exists(log_file) else {}
+    for path in sorted(glob.glob(f"{glob.escape(stem)}.*{extension}")):
+        user = os.path.basename(path)[len(os.path.basename(stem)) + 1:-len(extension)]
+        if user and "." not in user:
+            log_files[path] = user
+    return log_files
+
+#----------------------------------------------------------------------------------------------------------
+# Seconds per (user, area) in one log for each day from first_date to last_date, split at midnight
+#----------------------------------------------------------------------------------------------------------
+# Runs in a worker process, so it takes and returns only plain values. Returns {date: {(user, area): seconds}}
+# with every day in the range, empty ones included. Rows without a user are counted for the user the file is
+# named after.
+def aggregate_log(log_file, file_user, area_codes, first_date, last_date):
+    store = LogStore.open_store(log_file, area_codes, file_user)
+    edges = Aggregation.day_edges(first_date, last_date)
+    days = {first_date + datetime.timedelta(days=i): {} for i in range(len(edges) - 1)}
+    # Entries are indexed by the date they started, so include the day before for ones crossing midnight
+    df = store.read_dates(first_date - datetime.timedelta(days=1), last_date)
+    if df.empty:
+        return days
+    start = LogStore.to_epoch(df["Entry Time"])
+    stop = start + df["Duration (seconds)"].to_numpy(dtype="f8")
+    bucket, seconds, rows = Aggregation.split_at_edges(start, stop, edges)
+    users = df[LogStore.user_label].to_numpy(dtype=object)[rows]
+    users[users == ""] = file_user or unknown_user
+    areas = df["Area"].to_numpy(dtype=object)[rows]
+
+    dates = list(days)
+    for day, key, total in zip(bucket.tolist(), zip(users.tolist(), areas.tolist()), seconds.tolist()):
+        totals = days[dates[day]]
+        totals[key] = totals.get(key, 0.0) + total
+    return days
+
+# Adds partial {(user, area): seconds} totals together
+def merge_totals(partials):
+    merged = {}
+    for partial in partials:
+        for key, seconds in partial.items():
+            merged[key] = merged.get(key, 0.0) + seconds
+    return merged
+
+#----------------------------------------------------------------------------------------------------------
+# TeamRollup Class
+#----------------------------------------------------------------------------------------------------------
+# Hours per user and area across every engineer's log. Each log's per-day totals are kept with the log's size,
+# mtime and inode, so a query only re-reads the logs written since, plus any days no query has asked for yet;
+# those are spread over a process pool and the day totals summed.
+class TeamRollup:
+    def __init__(self, log_file, area_codes=None):
+        self._log_file = log_file
+        self._area_codes = dict(area_codes or {})
+        self._lock = threading.Lock()
+        self._pool = None
+        self._cache = {}
+        self._files_read = 0
+        atexit.register(self.close)
+
+    # Getters
+    def get_log_file(self):
+        return self._log_file
+
+    # Number of log reads so far, cached days excluded
+    def get_files_read(self):
+        return self._files_read
+
+    # Returns {(user, area): seconds} for the local days first_date to last_date inclusive
+    def area_seconds_between(self, first_date, last_date):
+        dates = [first_date + datetime.timedelta(days=i) for i in range((last_date - first_date).days + 1)]
+        with self._lock:
+            log_files = team_log_files(self._log_file)
+            stale = []
+            for path, user in log_files.items():
+                version = _file_version(path)
+                cached = self._cache.get(path)
+                days = cached[1] if cached is not None and cached[0] == version else {}
+                self._cache[path] = (version, days)
+                missing = [day for day in dates if day not in days]
+                if missing:
+                    stale.append((path, user, missing[0], missing[-1]))
+
+            for (path, _, _, _), days in zip(stale, self._aggregate(stale)):
+                self._cache[path][1].update(days)
+            self._files_read += len(stale)
+            # Forget logs that were deleted
+            for path in set(self._cache) - set(log_files):
+                del self._cache[path]
+            return merge_totals(self._cache[path][1][day] for path in log_files for day in dates)
+
+    def _aggregate(self, stale):
+        jobs = [(path, user, self._area_codes, first, last) for path, user, first, last in stale]
+        # One changed log (the usual case, someone just switched areas) is quicker to read here
+        if len(jobs) <= 1:
+            return [aggregate_log(*job) for job in jobs]
+        if self._pool is None:
+            # Spawned rather than forked, since the app's other threads may hold locks at fork time
+            self._pool = concurrent.futures.ProcessPoolExecutor(max_workers,
+                                                                mp_context=multiprocessing.get_context("spawn"))
+        return list(self._pool.map(aggregate_log, *zip(*jobs)))
+
+    # Returns (users, areas, grid[user, area] in hours) for the same days
+    def hours_table(self, first_date, last_date):
+        totals = self.area_seconds_between(first_date, last_date)
+        users = sorted({user for user, _ in totals})
+        areas = sorted({area for _, area in totals})
+        user_index = {user: i for i, user in enumerate(users)}
+        area_index = {area: i for i, area in enumerate(areas)}
+        grid = np.zeros((len(users), len(areas)))
+        for (user, area), seconds in totals.items():
+            grid[user_index[user], area_index[area]] = seconds / 3600
+        return users, areas, grid
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+def _file_version(path):
+    try:
+        stat = os.stat(path)
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+    except FileNotFoundError:
+        return None
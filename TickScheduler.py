@@ -0,0 +1,56 @@
+#----------------------------------------------------------------------------------------------------------
+# TickScheduler Class
+#----------------------------------------------------------------------------------------------------------
+# One shared Tk timer for every live widget. At most one after() call is ever pending, however often
+# start() is called, and a subscriber is only redrawn when its rendered text changes.
+class TickScheduler:
+    def __init__(self, root, interval=1000):
+        self._root = root
+        self._interval = interval
+        self._pending = None
+        self._subscribers = {}
+        self._next_token = 0
+
+    # Getters
+    def get_interval(self):
+        return self._interval
+
+    def get_pending_count(self):
+        return 0 if self._pending is None else 1
+
+    def is_running(self):
+        return self._pending is not None
+
+    # render() returns the widget's text; draw(text) is only called when that text changes
+    def subscribe(self, render, draw):
+        token = self._next_token
+        self._next_token += 1
+        self._subscribers[token] = [render, draw, None]
+        return token
+
+    def unsubscribe(self, token):
+        self._subscribers.pop(token, None)
+
+    # Starts ticking if not already running and redraws immediately
+    def start(self):
+        if self._pending is None:
+            self._pending = self._root.after(self._interval, self._tick)
+        self.tick_now()
+
+    def stop(self):
+        if self._pending is not None:
+            self._root.after_cancel(self._pending)
+            self._pending = None
+
+    # Redraws every subscriber without touching the timer
+    def tick_now(self):
+        for subscriber in list(self._subscribers.values()):
+            render, draw, last_text = subscriber
+            text = render()
+            if text != last_text:
+                draw(text)
+                subscriber[2] = text
+
+    def _tick(self):
+        self._pending = self._root.after(self._interval, self._tick)
+        self.tick_now()
@@ -3,7 +3,11 @@ import time
 #----------------------------------------------------------------------------------------------------------
 # TimePeriod Class
 #----------------------------------------------------------------------------------------------------------
+# Slotted, so an open period holds its three fields without a per-instance __dict__. Closed periods are kept
+# in an IntervalLog rather than as TimePeriod objects.
 class TimePeriod:
+    __slots__ = ("_start_time", "_stop_time", "_area_name")
+
     def __init__(self, start_time=None, stop_time=None, area_name=None):
         self._start_time = start_time
         self._stop_time = stop_time
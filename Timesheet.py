@@ -0,0 +1,151 @@
+import argparse
+import csv
+import datetime
+import getpass
+import json
+import os
+import sys
+import numpy as np
+import Aggregation
+import AppConfig
+import LogIndex
+import LogStore
+import TeamRollup
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+timesheet_fields = ["User", "Date", "Charge Code", "Hours"]
+
+# Charge code reported for areas without one (meetings, breaks, idle, ...), as in the app's area table
+no_charge_code = "-"
+
+#----------------------------------------------------------------------------------------------------------
+# Builds an {area name: charge code} table from the Streamlit areas dict
+#----------------------------------------------------------------------------------------------------------
+def build_charge_codes(areas, idle_label=None):
+    charge_codes = {name: no_charge_code if code is None else str(code) for name, code in areas.values()}
+    if idle_label is not None:
+        charge_codes.setdefault(idle_label, no_charge_code)
+    return charge_codes
+
+#----------------------------------------------------------------------------------------------------------
+# Yields one row per (user, date, charge code) with the hours logged from first_date to last_date
+#----------------------------------------------------------------------------------------------------------
+# sources is a list of (log store, file user) pairs. Each row counts for the user recorded with it, or for
+# the log's file user if none was, or for default_user in a shared log. Totals from every log are added
+# together before any row is written, so a user and charge code split over several logs is reported once.
+# The logs are read a chunk at a time and only the running totals (users x days x charge codes) are kept,
+# so memory stays flat however many years they cover. Entries that run past midnight are split between days.
+def timesheet_rows(sources, charge_codes, first_date, last_date, default_user=None, chunk_size=LogIndex.chunk_size):
+    default_user = default_user or getpass.getuser()
+    edges = Aggregation.day_edges(first_date, last_date)
+    charges = sorted(set(charge_codes.values()) | {no_charge_code})
+    charge_index = {charge: i for i, charge in enumerate(charges)}
+    totals = {}
+
+    for log_store, file_user in sources:
+        # Entries are indexed by the date they started, so include the day before for ones crossing midnight
+        chunks = log_store.iter_arrays_between(first_date - datetime.timedelta(days=1), last_date, chunk_size,
+                                               users=True)
+        for start, stop, codes, users in chunks:
+            days, seconds, rows = Aggregation.split_at_edges(start, stop, edges)
+            if len(rows) == 0:
+                continue
+            # CSV logs assign area codes as new names are parsed, so the lookup is rebuilt per chunk
+            names = log_store.get_area_names()
+            lookup = np.array([charge_index[charge_codes.get(names.get(code), no_charge_code)]
+                               for code in range(max(max(names, default=0), int(codes.max())) + 1)])
+            cells = days * len(charges) + lookup[codes[rows]]
+            users = users[rows]
+            users[users == ""] = file_user or default_user
+            for user in set(users.tolist()):
+                mine = users == user
+                if user not in totals:
+                    totals[user] = np.zeros((len(edges) - 1) * len(charges))
+                totals[user] += np.bincount(cells[mine], weights=seconds[mine], minlength=len(totals[user]))
+
+    for user in sorted(totals):
+        for day, row in enumerate(totals[user].reshape(len(edges) - 1, len(charges))):
+            date = first_date + datetime.timedelta(days=day)
+            for charge, seconds in zip(charges, row.tolist()):
+                hours = round(seconds / 3600, 2)
+                # A few seconds in an area would otherwise show up as a 0.0 hour line
+                if hours > 0:
+                    yield {"User": user, "Date": str(date), "Charge Code": charge, "Hours": hours}
+
+#----------------------------------------------------------------------------------------------------------
+# Writers that emit rows as they arrive
+#----------------------------------------------------------------------------------------------------------
+def write_csv(rows, file):
+    writer = csv.DictWriter(file, fieldnames=timesheet_fields)
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+def write_json(rows, file):
+    count = 0
+    file.write("[")
+    for row in rows:
+        file.write(",\n  " if count else "\n  ")
+        file.write(json.dumps(row))
+        count += 1
+    file.write("\n]\n" if count else "]\n")
+    return count
+
+writers = {"csv": write_csv, "json": write_json}
+
+#----------------------------------------------------------------------------------------------------------
+# Exports a pay period's timesheet for one or more logs
+#----------------------------------------------------------------------------------------------------------
+# Each log file listed brings in the per-user logs next to it (area_log.<user>.csv), and a per-user log
+# counts for the user it is named after. default_user is only used for rows logged without a user in a
+# shared log.
+def log_sources(log_files):
+    sources = {}
+    for log_file in log_files:
+        for path, user in TeamRollup.team_log_files(log_file).items():
+            if user is not None or path not in sources:
+                sources[path] = user
+        if sources.get(log_file) is None:
+            # A per-user log listed on its own: find its user from the shared log's name
+            stem, extension = os.path.splitext(log_file)
+            shared_file = os.path.splitext(stem)[0] + extension
+            sources[log_file] = TeamRollup.team_log_files(shared_file).get(log_file)
+    return sources
+
+def export(log_files, first_date, last_date, file, output_format="csv", default_user=None,
+           app_path=AppConfig.app_file):
+    areas, idle_label = AppConfig.load_app_areas(app_path)
+    charge_codes = build_charge_codes(areas, idle_label)
+    area_codes = LogStore.build_area_codes(areas, idle_label)
+    sources = [(LogStore.open_store(log_file, area_codes, user), user)
+               for log_file, user in log_sources(log_files).items() if os.path.exists(log_file)]
+    rows = timesheet_rows(sources, charge_codes, first_date, last_date, default_user)
+    return writers[output_format](rows, file)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export hours per user, date and charge code for a pay period.")
+    parser.add_argument("log_files", nargs="*", default=["area_log.csv"],
+                        help="logs to export; the per-user logs next to each are included")
+    parser.add_argument("--first", required=True, type=datetime.date.fromisoformat,
+                        help="first date of the pay period (YYYY-MM-DD)")
+    parser.add_argument("--last", required=True, type=datetime.date.fromisoformat,
+                        help="last date of the pay period (YYYY-MM-DD)")
+    parser.add_argument("--user", default=getpass.getuser(),
+                        help="user for rows logged without one in a shared log (default: the logged-in user)")
+    parser.add_argument("--format", choices=sorted(writers), default="csv")
+    parser.add_argument("--output", help="output file (default: stdout)")
+    args = parser.parse_args()
+
+    if args.last < args.first:
+        parser.error("--last is before --first")
+    if args.output:
+        with open(args.output, mode="w", newline="") as file:
+            count = export(args.log_files, args.first, args.last, file, args.format, args.user)
+        print(f"Wrote {count} rows to '{args.output}'.")
+    else:
+        export(args.log_files, args.first, args.last, sys.stdout, args.format, args.user)
@@ -0,0 +1,204 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_dir)
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+app_file = os.path.join(repo_dir, "TE_Timekeeping_toStreamLit.py")
+
+# ScriptFinishedStatus values sent at the end of a whole-script rerun and of a fragment rerun
+full_run_statuses = (0,)
+fragment_run_status = 3
+
+#----------------------------------------------------------------------------------------------------------
+# Server work for idle tabs of the real app, in each timer mode
+#----------------------------------------------------------------------------------------------------------
+# Starts TE_Timekeeping_toStreamLit.py with `streamlit run` and opens simulated tabs over the same websocket a
+# browser uses. Each tab does what the frontend does and nothing more: it runs the script once, then
+# reruns every fragment the server asks to auto-rerun (st.fragment(run_every=...)) on that fragment's
+# interval. Whole-script and fragment reruns are counted from the server's script_finished messages, and
+# the server process's CPU is read over the idle window. dashboard_refresh=None keeps the app's own setting.
+def app_script(timer_mode, dashboard_refresh=None):
+    with open(app_file, mode="r", encoding="utf-8") as file:
+        script = file.read()
+    script = re.sub(r"^timer_mode = .*$", f"timer_mode = {timer_mode!r}", script, count=1, flags=re.M)
+    if dashboard_refresh is not None:
+        script = re.sub(r"^dashboard_refresh = .*$", f"dashboard_refresh = {dashboard_refresh!r}", script,
+                        count=1, flags=re.M)
+    return script
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(script_file, port, directory):
+    python_path = os.pathsep.join(filter(None, [repo_dir, os.environ.get("PYTHONPATH")]))
+    environment = dict(os.environ, PYTHONPATH=python_path)
+    server = subprocess.Popen([sys.executable, "-m", "streamlit", "run", script_file, "--server.headless", "true",
+                               "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+                              cwd=directory, env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("the Streamlit server did not start")
+
+# User + system CPU seconds of another process
+def process_cpu(pid):
+    try:
+        import psutil
+        times = psutil.Process(pid).cpu_times()
+        return times.user + times.system
+    except ImportError:
+        with open(f"/proc/{pid}/stat", mode="r") as file:
+            fields = file.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+class Tab:
+    def __init__(self, url):
+        self.url = url
+        self.full_runs = 0
+        self.fragment_runs = 0
+        self.ready = asyncio.Event()
+        self._timers = {}
+        self._page_script_hash = ""
+
+    async def run(self, stop):
+        async with websockets.connect(self.url, subprotocols=["streamlit"], max_size=None) as socket_:
+            await self._rerun(socket_)
+            receiver = asyncio.create_task(self._receive(socket_))
+            await stop.wait()
+            receiver.cancel()
+            for timer in self._timers.values():
+                timer.cancel()
+
+    async def _rerun(self, socket_, fragment_id=""):
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        message.rerun_script.page_script_hash = self._page_script_hash
+        if fragment_id:
+            message.rerun_script.fragment_id = fragment_id
+            message.rerun_script.is_auto_rerun = True
+        await socket_.send(message.SerializeToString())
+
+    async def _auto_rerun(self, socket_, fragment_id, interval):
+        while True:
+            await asyncio.sleep(interval)
+            await self._rerun(socket_, fragment_id)
+
+    async def _receive(self, socket_):
+        async for data in socket_:
+            message = ForwardMsg()
+            message.ParseFromString(data)
+            kind = message.WhichOneof("type")
+            if kind == "new_session":
+                self._page_script_hash = message.new_session.page_script_hash
+            elif kind == "auto_rerun":
+                fragment_id = message.auto_rerun.fragment_id
+                if fragment_id not in self._timers:
+                    self._timers[fragment_id] = asyncio.create_task(
+                        self._auto_rerun(socket_, fragment_id, message.auto_rerun.interval))
+            elif kind == "stop_auto_rerun":
+                for fragment_id in list(self._timers):
+                    self._timers.pop(fragment_id).cancel()
+            elif kind == "script_finished":
+                if message.script_finished == fragment_run_status:
+                    self.fragment_runs += 1
+                elif message.script_finished in full_run_statuses:
+                    self.full_runs += 1
+                    self.ready.set()
+
+async def idle_tabs(port, server_pid, sessions, seconds):
+    url = f"ws://127.0.0.1:{port}/_stcore/stream"
+    tabs = [Tab(url) for _ in range(sessions)]
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(tab.run(stop)) for tab in tabs]
+
+    # First render, which both modes pay once per tab
+    started = time.perf_counter()
+    cpu_started = process_cpu(server_pid)
+    await asyncio.wait_for(asyncio.gather(*(tab.ready.wait() for tab in tabs)), timeout=300)
+    render_cpu = process_cpu(server_pid) - cpu_started
+    render_seconds = time.perf_counter() - started
+
+    # Idle window: no clicks, only what the page itself asks for
+    full_before = sum(tab.full_runs for tab in tabs)
+    fragment_before = sum(tab.fragment_runs for tab in tabs)
+    cpu_started = process_cpu(server_pid)
+    await asyncio.sleep(seconds)
+    idle_cpu = process_cpu(server_pid) - cpu_started
+    full_reruns = sum(tab.full_runs for tab in tabs) - full_before
+    fragment_reruns = sum(tab.fragment_runs for tab in tabs) - fragment_before
+
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return {"first_render_cpu_seconds": round(render_cpu, 4), "first_render_seconds": round(render_seconds, 4),
+            "idle_full_reruns": full_reruns, "idle_fragment_reruns": fragment_reruns,
+            "idle_cpu_seconds": round(idle_cpu, 4), "idle_cpu_per_second": round(idle_cpu / seconds, 4)}
+
+def run_mode(timer_mode, dashboard_refresh, sessions, seconds):
+    directory = tempfile.mkdtemp(prefix="te_idle_")
+    script_file = os.path.join(directory, "app.py")
+    with open(script_file, mode="w", encoding="utf-8") as file:
+        file.write(app_script(timer_mode, dashboard_refresh))
+    port = free_port()
+    server = start_server(script_file, port, directory)
+    try:
+        result = asyncio.run(idle_tabs(port, server.pid, sessions, seconds))
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(directory, ignore_errors=True)
+    return {"mode": timer_mode, "dashboard_refresh": dashboard_refresh, "sessions": sessions, "seconds": seconds,
+            **result}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count server reruns and CPU for idle tabs of the real app, "
+                                                 "in both timer modes.")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--seconds", type=int, default=30, help="idle seconds measured")
+    parser.add_argument("--dashboard-refresh", type=float, default=None,
+                        help="also run client mode with dashboard_refresh set to this many seconds")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    # Both timer modes run with the app's own dashboard_refresh setting
+    configurations = [("server", None), ("client", None)]
+    if args.dashboard_refresh:
+        configurations.append(("client", args.dashboard_refresh))
+    results = [run_mode(mode, refresh, args.sessions, args.seconds) for mode, refresh in configurations]
+    for result in results:
+        label = result["mode"] + (f", poll {result['dashboard_refresh']:g}s" if result["dashboard_refresh"] else "")
+        print(f"{label:>16}: {result['idle_full_reruns']} script + {result['idle_fragment_reruns']} fragment idle "
+              f"reruns, {result['idle_cpu_seconds']:.2f}s idle CPU ({result['idle_cpu_per_second']:.3f}s per idle "
+              f"second, first render {result['first_render_cpu_seconds']:.2f}s)")
+    if args.output:
+        with open(args.output, mode="w") as file:
+            json.dump(results, file, indent=2)
+
+    # With the browser-side timer and the app's own settings, an idle tab must never make the server run anything
+    client = next(r for r in results if r["mode"] == "client" and not r["dashboard_refresh"])
+    if client["idle_full_reruns"] or client["idle_fragment_reruns"]:
+        print("FAIL: idle tabs caused server reruns in client mode")
+        sys.exit(1)
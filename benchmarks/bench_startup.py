@@ -0,0 +1,235 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_dir)
+import generate_log
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+tk_app = os.path.join(repo_dir, "TE Timekeeping.py")
+streamlit_app = os.path.join(repo_dir, "TE_Timekeeping_toStreamLit.py")
+
+# Seconds each startup may take before the run fails, whatever the baseline says
+startup_budget = {
+    "tk_first_window": 1.0,
+    "streamlit_first_run": 2.0,
+    "tk_first_window_with_log": 1.0,
+    "streamlit_first_run_with_log": 2.0,
+}
+
+# Rows in the log the "with_log" runs start against
+default_log_rows = 100000
+
+# Analytics and charting stacks that must not load before a dashboard is opened
+deferred_modules = ("pandas", "matplotlib")
+
+# Top-level imports listed per entry point in the report
+report_imports = 10
+
+#----------------------------------------------------------------------------------------------------------
+# Child processes: each starts one entry point in a fresh interpreter and prints a JSON result
+#----------------------------------------------------------------------------------------------------------
+# Runs the Tk app until its first frame is drawn. Without a display the widgets are mocked, which still
+# times everything the app does before mainloop().
+tk_driver = """
+import time
+started = time.perf_counter()
+import json, os, runpy, sys, tkinter
+from unittest import mock
+sys.path.insert(0, {repo_dir!r})
+
+def first_window(root):
+    root.update()
+    elapsed = time.perf_counter() - started
+    print(json.dumps({{"seconds": elapsed, "display": not {headless!r},
+                      "modules": [m for m in {deferred_modules!r} if m in sys.modules]}}))
+    root.destroy()
+
+if {headless!r}:
+    patches = [mock.patch.object(tkinter, name) for name in ("Tk", "Frame", "Canvas", "Label", "Button")]
+    patches.append(mock.patch("tkinter.ttk.Scrollbar"))
+    for patch in patches:
+        patch.start()
+    tkinter.Tk.return_value.mainloop.side_effect = lambda: first_window(mock.MagicMock())
+else:
+    tkinter.Tk.mainloop = first_window
+runpy.run_path({app!r}, run_name="__main__")
+"""
+
+# Runs the Streamlit script once, headless, as a new browser session would
+streamlit_driver = """
+import time
+started = time.perf_counter()
+import json, sys
+sys.path.insert(0, {repo_dir!r})
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+app = AppTest.from_file({app!r}, default_timeout=60)
+app.run()
+finished = time.perf_counter()
+result = {{"seconds": finished - imported, "import_seconds": imported - started, "errors": len(app.exception),
+          "modules": [m for m in {deferred_modules!r} if m in sys.modules]}}
+if {open_dashboard!r}:
+    # Then the rerun that opens the dashboard, which is where pandas and matplotlib load
+    app.toggle(key="show_dashboard").set_value(True).run()
+    result["dashboard_seconds"] = time.perf_counter() - finished
+    result["errors"] = len(app.exception)
+print(json.dumps(result))
+"""
+
+def has_display():
+    if os.name == "nt" or sys.platform == "darwin":
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+def run_child(code, directory, importtime=False):
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    started = time.perf_counter()
+    completed = subprocess.run(command, cwd=directory, capture_output=True, text=True, timeout=300)
+    wall = time.perf_counter() - started
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        raise RuntimeError(f"startup run failed:\n{completed.stderr[-2000:]}")
+    result = json.loads(lines[-1])
+    result["wall_seconds"] = wall
+    result["stderr"] = completed.stderr
+    return result
+
+#----------------------------------------------------------------------------------------------------------
+# Parses `python -X importtime` output into the slowest top-level imports
+#----------------------------------------------------------------------------------------------------------
+# Lines look like "import time:       123 |       4567 | package"; nested imports are indented.
+def top_imports(stderr, count=report_imports):
+    imports = []
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)", line)
+        if match and len(match.group(3)) == 1:
+            imports.append({"module": match.group(4), "cumulative_ms": round(int(match.group(2)) / 1000, 2)})
+    return sorted(imports, key=lambda entry: -entry["cumulative_ms"])[:count]
+
+#----------------------------------------------------------------------------------------------------------
+# Times each entry point best-of-repeat and collects its import report
+#----------------------------------------------------------------------------------------------------------
+# Each app starts twice: with no log yet, as on a first start, and against an existing log of log_rows
+# rows. Neither may load pandas or matplotlib before a dashboard is opened. The Streamlit run against the
+# existing log then opens its dashboard, which is timed as streamlit_dashboard_open.
+def bench_startup(repeat, log_rows=default_log_rows):
+    empty_directory = tempfile.mkdtemp(prefix="te_startup_")
+    log_directory = tempfile.mkdtemp(prefix="te_startup_log_")
+    generate_log.write_log(os.path.join(log_directory, "area_log.csv"), log_rows)
+    headless = not has_display()
+
+    def tk_run(directory):
+        return tk_driver.format(repo_dir=repo_dir, app=tk_app, headless=headless,
+                                deferred_modules=deferred_modules), directory
+
+    def streamlit_run(directory, open_dashboard):
+        return streamlit_driver.format(repo_dir=repo_dir, app=streamlit_app, deferred_modules=deferred_modules,
+                                       open_dashboard=open_dashboard), directory
+
+    runs = {
+        "tk_first_window": tk_run(empty_directory),
+        "streamlit_first_run": streamlit_run(empty_directory, False),
+        "tk_first_window_with_log": tk_run(log_directory),
+        "streamlit_first_run_with_log": streamlit_run(log_directory, True),
+    }
+    results, imports, problems = [], {}, []
+    try:
+        for metric, (code, directory) in runs.items():
+            best = min((run_child(code, directory) for _ in range(repeat)), key=lambda r: r["seconds"])
+            results.append({"metric": metric, "seconds": round(best["seconds"], 6),
+                            "wall_seconds": round(best["wall_seconds"], 6)})
+            if best.get("display") is False:
+                results[-1]["headless"] = True
+            if metric == "streamlit_first_run":
+                results.append({"metric": "streamlit_import", "seconds": round(best["import_seconds"], 6),
+                                "wall_seconds": None})
+            if "dashboard_seconds" in best:
+                results.append({"metric": "streamlit_dashboard_open", "seconds": round(best["dashboard_seconds"], 6),
+                                "wall_seconds": None})
+            if best["modules"]:
+                problems.append(f"{metric}: loaded {', '.join(best['modules'])} before any dashboard was opened")
+            if best.get("errors"):
+                problems.append(f"{metric}: the app raised {best['errors']} exception(s)")
+            imports[metric] = top_imports(run_child(code, directory, importtime=True)["stderr"])
+    finally:
+        shutil.rmtree(empty_directory, ignore_errors=True)
+        shutil.rmtree(log_directory, ignore_errors=True)
+    return results, imports, problems
+
+#----------------------------------------------------------------------------------------------------------
+# Budget and baseline checks; both return a list of failures
+#----------------------------------------------------------------------------------------------------------
+def check_budget(results):
+    failures = []
+    for result in results:
+        budget = startup_budget.get(result["metric"])
+        if budget is not None and result["seconds"] > budget:
+            failures.append(f"{result['metric']} took {result['seconds']:.3f}s, over its {budget:.3f}s budget")
+    return failures
+
+def compare(results, baseline, tolerance):
+    previous = {r["metric"]: r["seconds"] for r in baseline["results"]}
+    failures = []
+    for result in results:
+        before = previous.get(result["metric"])
+        if not before:
+            continue
+        ratio = result["seconds"] / before
+        marker = "  REGRESSION" if ratio > tolerance else ""
+        print(f"{result['metric']:<22} {before:>8.4f}s -> {result['seconds']:>8.4f}s  x{ratio:.2f}{marker}")
+        if ratio > tolerance:
+            failures.append(f"{result['metric']} is x{ratio:.2f} slower than the baseline")
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time how long each app takes to start, and which imports it "
+                                                 "waits on.")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per entry point; the fastest counts")
+    parser.add_argument("--log-rows", type=int, default=default_log_rows,
+                        help="rows in the existing log the with_log runs start against")
+    parser.add_argument("--output", default="startup_results.json", help="where to write results as JSON")
+    parser.add_argument("--baseline", help="results file from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="slowdown ratio that counts as a regression (default 1.25)")
+    args = parser.parse_args()
+
+    results, imports, failures = bench_startup(args.repeat, args.log_rows)
+    for result in results:
+        note = " (headless)" if result.get("headless") else ""
+        print(f"{result['metric']:<28} {result['seconds']:.4f}s{note}")
+    for metric, entries in imports.items():
+        print(f"\nSlowest imports for {metric}:")
+        for entry in entries:
+            print(f"  {entry['cumulative_ms']:>9.1f} ms  {entry['module']}")
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+        "imports": imports,
+    }
+    with open(args.output, mode="w") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nResults written to '{args.output}'.")
+
+    failures += check_budget(results)
+    if args.baseline:
+        with open(args.baseline, mode="r") as file:
+            failures += compare(results, json.load(file), args.tolerance)
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
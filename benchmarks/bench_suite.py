@@ -0,0 +1,184 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import AppConfig
+import Aggregation
+import Charts
+import LogStore
+import generate_log
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+default_sizes = [1000, 100000, 10000000]
+
+# Single appends timed per size, the way log_entry_exit() writes
+append_count = 200
+
+# Logs at least this large are timed once instead of best-of-repeats
+large_log_rows = 1000000
+
+#----------------------------------------------------------------------------------------------------------
+# Timing helpers
+#----------------------------------------------------------------------------------------------------------
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+# The dashboard's original load path: full pd.read_csv plus date parsing with format inference
+def load_with_pandas(log_file):
+    df = pd.read_csv(log_file)
+    df['Entry Time'] = pd.to_datetime(df['Entry Time'])
+    df['Exit Time'] = pd.to_datetime(df['Exit Time'])
+    return df
+
+def remove_derived_files(log_file):
+    for suffix in (".idx.json", ".idx.json.journal", ".rollup.json", ".rollup.json.journal"):
+        if os.path.exists(log_file + suffix):
+            os.remove(log_file + suffix)
+
+#----------------------------------------------------------------------------------------------------------
+# Times load, filter, aggregate, render and append for one generated log
+#----------------------------------------------------------------------------------------------------------
+def bench_log(directory, rows, log_format, users):
+    log_file = os.path.join(directory, f"bench_{rows}.{log_format}")
+    generate_log.write_log(log_file, rows, users=users)
+    area_codes = LogStore.build_area_codes(*AppConfig.load_app_areas())
+    area_colors = tuple(AppConfig.load_app_globals(("area_colors",))["area_colors"].items())
+    repeat = 1 if rows >= large_log_rows else 3
+    results = {}
+
+    def open_store():
+        return LogStore.open_store(log_file, area_codes)
+
+    results["full_load"] = timed(lambda: open_store().read_frame(), repeat)
+    if log_format == "csv":
+        results["full_load_pandas"] = timed(lambda: load_with_pandas(log_file), repeat)
+
+    store = open_store()
+    df = store.read_frame()
+    day = df["Entry Time"].iloc[len(df) // 2].date()
+    results["day_filter_full_frame"] = timed(lambda: df[df["Entry Time"].dt.date == day], repeat)
+
+    remove_derived_files(log_file)
+    results["index_build"] = timed(lambda: open_store().read_day(day), 1)
+    results["day_read_indexed"] = timed(lambda: open_store().read_day(day), repeat)
+
+    df_day = open_store().read_day(day)
+    results["groupby_day"] = timed(lambda: df_day.groupby("Area")["Duration (seconds)"].sum(), repeat)
+    start, stop, codes = store.read_arrays()
+    first_date = df["Entry Time"].min().date()
+    last_date = df["Entry Time"].max().date()
+    results["aggregate_all_days_numpy"] = timed(
+        lambda: Aggregation.daily_area_seconds(start, stop, codes, first_date, last_date), repeat)
+
+    # Whole days come from the rollup; a range that doesn't end at midnight loads the interval index for the
+    # days it touches on first use, then answers in O(log n + k)
+    range_store = open_store()
+    week_start = day - datetime.timedelta(days=day.weekday())
+    results["range_query_day"] = timed(lambda: range_store.area_seconds_between(day, day), repeat)
+    results["range_query_week"] = timed(
+        lambda: range_store.area_seconds_between(week_start, week_start + datetime.timedelta(days=6)), repeat)
+    t0, t1 = Aggregation.day_edges(day, day)[[0, -1]] + (8 * 3600, -8 * 3600)
+    results["partial_range_query_cold"] = timed(lambda: open_store().area_seconds(t0, t1), 1)
+    results["partial_range_query"] = timed(lambda: range_store.area_seconds(t0, t1), repeat)
+
+    results["rollup_rebuild"] = timed(lambda: open_store().get_rollup().rebuild(), 1)
+    results["rollup_day_totals"] = timed(lambda: open_store().get_rollup().day_totals(day), repeat)
+
+    area_totals = tuple(sorted(open_store().get_rollup().day_totals(day).items()))
+    def render_uncached():
+        Charts.pie_chart_png.cache_clear()
+        Charts.pie_chart_png(area_totals, area_colors)
+    results["chart_render"] = timed(render_uncached, repeat)
+    results["chart_render_cached"] = timed(lambda: Charts.pie_chart_png(area_totals, area_colors), repeat)
+
+    # Last, since it grows the log. The store's rollup is brought up to date first, as in a running app, so
+    # only the per-click cost is timed.
+    now = time.time()
+    append_store = open_store()
+    append_store.refresh_rollup()
+    def append_rows():
+        for i in range(append_count):
+            append_store.append("Training", now + i, now + i + 0.5)
+    results["append_per_row"] = timed(append_rows, 1) / append_count
+
+    os.remove(log_file)
+    return [{"rows": rows, "format": log_format, "metric": metric, "seconds": round(seconds, 6)}
+            for metric, seconds in results.items()]
+
+#----------------------------------------------------------------------------------------------------------
+# Compares results against a baseline file; returns the metrics that got slower than tolerance allows
+#----------------------------------------------------------------------------------------------------------
+def compare(results, baseline, tolerance):
+    previous = {(r["rows"], r["format"], r["metric"]): r["seconds"] for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        key = (result["rows"], result["format"], result["metric"])
+        if key not in previous or previous[key] <= 0:
+            continue
+        ratio = result["seconds"] / previous[key]
+        marker = "  REGRESSION" if ratio > tolerance else ""
+        print(f"{result['rows']:>10} {result['format']:>4} {result['metric']:<26} "
+              f"{previous[key]:>10.4f}s -> {result['seconds']:>10.4f}s  x{ratio:.2f}{marker}")
+        if ratio > tolerance:
+            regressions.append(result)
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless benchmarks for loading, filtering, aggregating, "
+                                                 "rendering and appending area logs.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=default_sizes, help="log sizes in rows")
+    parser.add_argument("--formats", nargs="+", default=["csv"], choices=["csv", "bin"])
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--output", default="bench_results.json", help="where to write results as JSON")
+    parser.add_argument("--baseline", help="results file from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="slowdown ratio that counts as a regression (default 1.25)")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="te_bench_")
+    results = []
+    try:
+        for rows in args.sizes:
+            for log_format in args.formats:
+                for result in bench_log(directory, rows, log_format, args.users):
+                    results.append(result)
+                    print(f"{result['rows']:>10} {result['format']:>4} {result['metric']:<26} {result['seconds']:.6f}s")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(args.output, mode="w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to '{args.output}'.")
+
+    if args.baseline:
+        with open(args.baseline, mode="r") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} metric(s) slower than x{args.tolerance} of the baseline.")
+            sys.exit(1)
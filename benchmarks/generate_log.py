@@ -0,0 +1,109 @@
+import argparse
+import datetime
+import os
+import sys
+import time
+import numpy as np
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_dir)
+import AppConfig
+import LogStore
+
+#----------------------------------------------------------------------------------------------------------
+# GLOBALS
+#----------------------------------------------------------------------------------------------------------
+# Rows formatted and written per chunk
+chunk_size = 100000
+
+# Logged hours per user per day, starting at 07:00 local time
+shift_hours = 8
+shift_start_hour = 7
+
+#----------------------------------------------------------------------------------------------------------
+# Area names as the app logs them
+#----------------------------------------------------------------------------------------------------------
+def load_area_names(path=AppConfig.app_file):
+    areas, idle_label = AppConfig.load_app_areas(path)
+    # The "Idle" button logs the idle label, as switch_area() does in the app
+    return [idle_label if name == "Idle" else name for name, _ in areas.values()]
+
+#----------------------------------------------------------------------------------------------------------
+# Builds (area names, start, stop, user index) arrays for a team of users switching areas through their shifts
+#----------------------------------------------------------------------------------------------------------
+# Rows are ordered by stop time, as they are when every session appends to one shared log.
+def generate_rows(rows, users=5, switches_per_hour=4, last_date=None, seed=0):
+    rng = np.random.default_rng(seed)
+    area_names = np.array(load_area_names(), dtype=object)
+    switches = max(1, int(shift_hours * switches_per_hour))
+    days = max(1, -(-rows // (users * switches)))
+    last_date = last_date or datetime.date.today()
+
+    # Local shift start for every (day, user)
+    first_date = last_date - datetime.timedelta(days=days - 1)
+    day_starts = np.array([time.mktime((d.year, d.month, d.day, shift_start_hour, 0, 0, 0, 0, -1))
+                           for d in (first_date + datetime.timedelta(days=i) for i in range(days))])
+    shift_starts = np.repeat(day_starts, users)
+
+    # Random switch points inside each shift; each row runs from one switch to the next
+    points = np.sort(rng.uniform(0, shift_hours * 3600, size=(len(shift_starts), switches - 1)), axis=1)
+    edges = np.concatenate([np.zeros((len(shift_starts), 1)), points,
+                            np.full((len(shift_starts), 1), shift_hours * 3600)], axis=1)
+    start = (shift_starts[:, None] + edges[:, :-1]).ravel()
+    stop = (shift_starts[:, None] + edges[:, 1:]).ravel()
+    names = area_names[rng.integers(0, len(area_names), size=len(start))]
+    row_users = np.repeat(np.tile(np.arange(users), days), switches)
+
+    order = np.argsort(stop, kind="stable")[-rows:]
+    return names[order], start[order], stop[order], row_users[order]
+
+def user_name(index):
+    return f"user{index + 1}"
+
+#----------------------------------------------------------------------------------------------------------
+# Writes a synthetic log in the store's own format
+#----------------------------------------------------------------------------------------------------------
+def write_log(log_file, rows, users=5, switches_per_hour=4, seed=0):
+    names, start, stop, row_users = generate_rows(rows, users, switches_per_hour, seed=seed)
+    # Built directly so a sibling CSV is never migrated into a new binary log
+    binary = os.path.splitext(log_file)[1].lower() in LogStore.binary_extensions
+    store_class = LogStore.BinaryLogStore if binary else LogStore.CsvLogStore
+    area_codes = LogStore.build_area_codes(*AppConfig.load_app_areas())
+    # One store per user, as each user's app opens the log, so every CSV row records who logged it.
+    # Binary records have no user field, so there the stores write the same bytes.
+    stores = [store_class(log_file, area_codes, user_name(i)) for i in range(users)]
+    stores[0].create()
+    with open(log_file, mode="ab") as file:
+        for first in range(0, len(start), chunk_size):
+            chunk = slice(first, first + chunk_size)
+            file.write(b"".join(format_chunk(stores, names[chunk], start[chunk], stop[chunk], row_users[chunk])))
+    return len(start)
+
+# Formats each user's rows with that user's store and returns the encoded rows in their original order
+def format_chunk(stores, names, start, stop, row_users):
+    encoded = np.empty(len(start), dtype=object)
+    for user, store in enumerate(stores):
+        rows = np.flatnonzero(row_users == user)
+        if len(rows) == 0:
+            continue
+        data = store.format_rows(list(zip(names[rows], start[rows].tolist(), stop[rows].tolist())))
+        if isinstance(store, LogStore.BinaryLogStore):
+            size = LogStore.record_dtype.itemsize
+            encoded[rows] = [data[i:i + size] for i in range(0, len(data), size)]
+        else:
+            encoded[rows] = data.splitlines(keepends=True)
+    return encoded.tolist()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic area log for benchmarking.")
+    parser.add_argument("log_file", nargs="?", default="area_log.csv")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--switches-per-hour", type=float, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if os.path.exists(args.log_file):
+        parser.error(f"'{args.log_file}' already exists")
+    count = write_log(args.log_file, args.rows, args.users, args.switches_per_hour, args.seed)
+    print(f"Wrote {count} rows to '{args.log_file}'.")
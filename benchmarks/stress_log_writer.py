@@ -0,0 +1,88 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import LogReader
+import LogStore
+import LogWriter
+
+#----------------------------------------------------------------------------------------------------------
+# Stress test for LogWriter: many sessions switching areas at once, in threads and in processes
+#----------------------------------------------------------------------------------------------------------
+area_names = ["Vigilance", "Enterprise", "Liberty", "Intrepid", "Freedom", "Pioneer",
+              "Meeting", "Breaks", "Training", "E3 Projects", "Untracked (Idle)"]
+
+# Simulates one session clicking through areas as fast as it can
+def run_session(writer, session, switches, barrier):
+    barrier.wait()
+    start_time = time.time()
+    for i in range(switches):
+        stop_time = start_time + 1 + (session % 7)
+        writer.submit(area_names[(session + i) % len(area_names)], start_time, stop_time)
+        start_time = stop_time
+
+# One process = one Streamlit server with its own shared writer
+def run_process(log_file, sessions, switches, fsync):
+    writer = LogWriter.LogWriter(LogStore.open_store(log_file), fsync=fsync)
+    barrier = threading.Barrier(sessions)
+    threads = [threading.Thread(target=run_session, args=(writer, s, switches, barrier)) for s in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.close()
+    return writer.get_batches_written()
+
+def check_log(log_file, expected_rows):
+    errors = []
+    with open(log_file, mode="rb") as file:
+        data = file.read()
+    if data and not data.endswith(b"\n"):
+        errors.append("log ends with a partial row")
+    lines = data.splitlines()
+    header = ",".join(LogReader.csv_labels).encode()
+    rows = [line for line in lines if line != header]
+    bad = [line for line in rows if len(line.split(b",")) != 4]
+    if bad:
+        errors.append(f"{len(bad)} malformed rows, e.g. {bad[0]!r}")
+    parsed = LogReader.parse_log_bytes(data)
+    if len(rows) != expected_rows or len(parsed) != expected_rows:
+        errors.append(f"expected {expected_rows} rows, found {len(rows)} lines and {len(parsed)} parsed rows")
+    day_totals = LogStore.open_store(log_file).get_rollup().days_between("0001-01-01", "9999-12-31")
+    rollup_seconds = sum(sum(totals.values()) for totals in day_totals.values())
+    if abs(rollup_seconds - parsed["Duration (seconds)"].sum()) > 0.01 * max(expected_rows, 1):
+        errors.append(f"rollup total {rollup_seconds} does not match log total {parsed['Duration (seconds)'].sum()}")
+    return errors
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stress the shared log writer with simultaneous area switches.")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--sessions", type=int, default=48, help="sessions per process")
+    parser.add_argument("--switches", type=int, default=200, help="switches per session")
+    parser.add_argument("--fsync", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        log_file = os.path.join(directory, "area_log.csv")
+        LogStore.open_store(log_file).create()
+
+        started = time.perf_counter()
+        with multiprocessing.Pool(args.processes) as pool:
+            batches = pool.starmap(run_process, [(log_file, args.sessions, args.switches, args.fsync)] * args.processes)
+        elapsed = time.perf_counter() - started
+
+        expected_rows = args.processes * args.sessions * args.switches
+        errors = check_log(log_file, expected_rows)
+
+    print(f"{expected_rows} rows from {args.processes} processes x {args.sessions} sessions "
+          f"in {sum(batches)} batches, {elapsed:.2f}s")
+    for error in errors:
+        print(f"FAIL: {error}")
+    if errors:
+        sys.exit(1)
+    print("OK")
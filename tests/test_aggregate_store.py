@@ -0,0 +1,87 @@
+import datetime
+import threading
+import time
+import AggregateStore
+import LogStore
+
+def make_store(tmp_path):
+    log_store = LogStore.open_store(str(tmp_path / "area_log.csv"))
+    log_store.create()
+    day = time.mktime((2026, 10, 1, 9, 0, 0, 0, 0, -1))
+    log_store.append_many([("Training", day + i * 86400, day + i * 86400 + 3600) for i in range(20)])
+    return log_store
+
+def run_threads(count, target):
+    errors = []
+    def run(i):
+        try:
+            target(i)
+        except Exception as error:
+            errors.append(error)
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+#----------------------------------------------------------------------------------------------------------
+# Single-flight: sessions asking for the same key at once share one computation
+#----------------------------------------------------------------------------------------------------------
+def test_same_key_is_computed_once(tmp_path):
+    aggregates = AggregateStore.AggregateStore(make_store(tmp_path))
+    aggregates.refresh()
+    calls = []
+    started = threading.Event()
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "result"
+
+    results = []
+    def ask(i):
+        if i:
+            started.wait()
+        results.append(aggregates._cached(("key",), compute))
+    assert run_threads(8, ask) == []
+    assert len(calls) == 1
+    assert results == ["result"] * 8
+
+def test_failed_computation_is_retried_by_a_waiter(tmp_path):
+    aggregates = AggregateStore.AggregateStore(make_store(tmp_path))
+    aggregates.refresh()
+    calls = []
+    started = threading.Event()
+    def compute():
+        calls.append(1)
+        if len(calls) == 1:
+            started.set()
+            time.sleep(0.1)
+            raise RuntimeError("first try fails")
+        return "result"
+
+    results = []
+    def ask(i):
+        if i:
+            started.wait()
+        results.append(aggregates._cached(("key",), compute))
+    errors = run_threads(4, ask)
+    assert [str(error) for error in errors] == ["first try fails"]
+    assert results == ["result"] * 3
+    assert len(calls) == 2
+
+#----------------------------------------------------------------------------------------------------------
+# Concurrent reads of many date ranges through the log store's range cache
+#----------------------------------------------------------------------------------------------------------
+def test_concurrent_read_dates(tmp_path, monkeypatch):
+    monkeypatch.setattr(LogStore, "range_cache_size", 4)
+    aggregates = AggregateStore.AggregateStore(make_store(tmp_path))
+    first = datetime.date(2026, 10, 1)
+
+    def read(i):
+        for j in range(40):
+            day = first + datetime.timedelta(days=(i + j) % 20)
+            assert len(aggregates.read_dates(day, day)) == 1
+            assert aggregates.area_seconds_between(day, day) == {"Training": 3600.0}
+    assert run_threads(8, read) == []
@@ -0,0 +1,157 @@
+import datetime
+import time
+import numpy as np
+import pytest
+import Aggregation
+import IntervalLog
+import LogStore
+
+areas = {"Training": 1, "Breaks": 2, "ESS Chambers": 3}
+
+def local_epoch(year, month, day, hour=0, minute=0):
+    return time.mktime((year, month, day, hour, minute, 0, 0, 0, -1))
+
+#----------------------------------------------------------------------------------------------------------
+# Appending and growing
+#----------------------------------------------------------------------------------------------------------
+def test_append_grows_past_initial_size():
+    log = IntervalLog.IntervalLog(areas)
+    count = IntervalLog.initial_size * 3 + 1
+    for i in range(count):
+        log.append("Training" if i % 2 else "Breaks", i * 10.0, i * 10.0 + 5)
+    start, stop, codes = log.arrays()
+    assert len(log) == count
+    assert np.array_equal(start, np.arange(count) * 10.0)
+    assert np.array_equal(stop - start, np.full(count, 5.0))
+    assert np.array_equal(codes, np.where(np.arange(count) % 2, areas["Training"], areas["Breaks"]))
+    assert log.covers(0)
+
+def test_unknown_areas_get_new_codes():
+    log = IntervalLog.IntervalLog(areas)
+    log.append("Meeting", 0, 1)
+    assert log.get_area_codes()["Meeting"] == max(areas.values()) + 1
+    assert log.get_area_names()[log.arrays()[2][0]] == "Meeting"
+
+def test_extend_matches_append():
+    appended = IntervalLog.IntervalLog(areas)
+    for i in range(300):
+        appended.append("Breaks", i, i + 0.5)
+    extended = IntervalLog.IntervalLog(areas)
+    extended.extend(np.arange(300.0), np.arange(300.0) + 0.5, np.full(300, areas["Breaks"]))
+    for left, right in zip(appended.arrays(), extended.arrays()):
+        assert np.array_equal(left, right)
+
+#----------------------------------------------------------------------------------------------------------
+# Dropping the oldest intervals at capacity
+#----------------------------------------------------------------------------------------------------------
+def test_capacity_drops_oldest_half():
+    capacity = 512
+    log = IntervalLog.IntervalLog(areas, capacity=capacity)
+    for i in range(capacity + 1):
+        log.append("Training", i * 10.0, i * 10.0 + 5)
+    start, stop, _ = log.arrays()
+    assert len(log) == capacity // 2 + 1
+    assert start[0] == (capacity // 2) * 10.0
+    assert start[-1] == capacity * 10.0
+
+    # Every interval overlapping the kept range is held; the dropped ones stopped at or before that
+    assert log.get_dropped_until() == (capacity // 2 - 1) * 10.0 + 5
+    assert log.covers(start[0])
+    assert log.covers(log.get_dropped_until())
+    assert not log.covers(0)
+
+def test_never_holds_more_than_capacity():
+    capacity = 300
+    log = IntervalLog.IntervalLog(areas, capacity=capacity)
+    for i in range(capacity * 5):
+        log.append("Breaks", i, i + 1)
+        assert len(log) <= capacity
+    assert log.arrays()[0][-1] == capacity * 5 - 1
+
+#----------------------------------------------------------------------------------------------------------
+# Views stay valid after later appends
+#----------------------------------------------------------------------------------------------------------
+def test_views_survive_growth_and_trimming():
+    log = IntervalLog.IntervalLog(areas, capacity=512)
+    for i in range(100):
+        log.append("Training", i, i + 1)
+    start, stop, codes = log.arrays()
+    frame = log.to_frame()
+    expected = start.copy()
+
+    # Enough to grow the arrays and then drop the oldest half several times
+    for i in range(100, 2000):
+        log.append("Breaks", i, i + 1)
+    assert np.array_equal(start, expected)
+    assert np.array_equal(frame["start"].to_numpy(), expected)
+    assert np.array_equal(codes, np.full(100, areas["Training"]))
+    assert len(log) < 2000
+
+def test_views_are_read_only():
+    log = IntervalLog.IntervalLog(areas)
+    log.append("Training", 0, 1)
+    for view in log.arrays():
+        with pytest.raises(ValueError):
+            view[0] = 5
+
+def test_clear_keeps_earlier_views():
+    log = IntervalLog.IntervalLog(areas)
+    log.append("Training", 0, 1)
+    start, _, _ = log.arrays()
+    log.clear()
+    log.append("Breaks", 7, 8)
+    assert len(log) == 1
+    assert start[0] == 0
+
+#----------------------------------------------------------------------------------------------------------
+# Totals match the log store's
+#----------------------------------------------------------------------------------------------------------
+@pytest.fixture(params=["csv", "bin"])
+def store(request, tmp_path):
+    log_store = LogStore.open_store(str(tmp_path / f"area_log.{request.param}"), areas)
+    log_store.create()
+    return log_store
+
+def fill(log_store, log):
+    # Whole seconds, so the CSV log's ctime strings keep every entry exact
+    day = local_epoch(2026, 10, 12)
+    entries = [("Training", 8 * 3600, 9 * 3600), ("Breaks", 9 * 3600, 9 * 3600 + 900),
+               ("ESS Chambers", 10 * 3600, 12 * 3600), ("Training", 23 * 3600, 25 * 3600),
+               ("Breaks", 2 * 86400 + 3600, 2 * 86400 + 5400), ("Meeting", 4 * 86400, 4 * 86400 + 60)]
+    for area_name, start, stop in entries:
+        log.write_through(log_store, area_name, day + start, day + stop)
+
+def test_area_seconds_match_log_store(store):
+    log = IntervalLog.IntervalLog(areas)
+    fill(store, log)
+    first_date, last_date = datetime.date(2026, 10, 12), datetime.date(2026, 10, 18)
+    for t0, t1 in [Aggregation.day_edges(first_date, last_date)[[0, -1]],
+                   Aggregation.day_edges(first_date, first_date)[[0, -1]],
+                   (local_epoch(2026, 10, 12, 8, 30), local_epoch(2026, 10, 12, 10, 30))]:
+        assert log.area_seconds(t0, t1) == pytest.approx(store.area_seconds(t0, t1))
+
+def test_daily_area_seconds_match_log_store(store):
+    log = IntervalLog.IntervalLog(areas)
+    fill(store, log)
+    first_date, last_date = datetime.date(2026, 10, 12), datetime.date(2026, 10, 18)
+    codes, grid = log.daily_area_seconds(first_date, last_date)
+    store_codes, store_grid = store.daily_area_seconds(first_date, last_date)
+    assert np.array_equal(codes, store_codes)
+    assert np.allclose(grid, store_grid)
+    # The entry crossing midnight is split between the two days
+    training = list(codes).index(areas["Training"])
+    assert grid[0, training] == pytest.approx(2 * 3600)
+    assert grid[1, training] == pytest.approx(3600)
+
+def test_load_mirrors_log_store(store):
+    fill(store, IntervalLog.IntervalLog(areas))
+    first_date, last_date = datetime.date(2026, 10, 12), datetime.date(2026, 10, 18)
+    log = IntervalLog.IntervalLog()
+    log.load(store, first_date, last_date)
+    assert log.is_current(store, first_date)
+    edges = Aggregation.day_edges(first_date, last_date)
+    assert log.area_seconds(edges[0], edges[-1]) == pytest.approx(store.area_seconds_between(first_date, last_date))
+
+    # Written by someone else: no longer current
+    store.append("Training", edges[-2], edges[-2] + 60)
+    assert not log.is_current(store, first_date)
@@ -0,0 +1,46 @@
+import time
+import LogReader
+import LogStore
+
+def append_rows(log_store, first, count):
+    start = time.mktime((2026, 10, 12, 8, 0, 0, 0, 0, -1))
+    log_store.append_many([("Training" if i % 2 else "Breaks", start + i * 60, start + i * 60 + 30)
+                           for i in range(first, first + count)])
+
+def test_tail_reads_add_only_new_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(LogReader, "initial_capacity", 4)
+    log_store = LogStore.open_store(str(tmp_path / "area_log.csv"))
+    log_store.create()
+    reader = LogReader.LogReader(log_store.get_log_file())
+    assert reader.read().empty
+
+    append_rows(log_store, 0, 3)
+    first = reader.read()
+    assert first["Area"].tolist() == ["Breaks", "Training", "Breaks"]
+    assert reader.read() is first
+
+    # Enough rows to outgrow the columns a few times
+    for block in range(5):
+        append_rows(log_store, 3 + block * 7, 7)
+        frame = reader.read()
+        assert len(frame) == 3 + (block + 1) * 7
+    assert (frame["Duration (seconds)"] == 30.0).all()
+    assert frame["Entry Time"].is_monotonic_increasing
+    # Frames returned earlier are left as they were
+    assert first["Area"].tolist() == ["Breaks", "Training", "Breaks"]
+
+    whole = LogReader.parse_log_bytes(open(log_store.get_log_file(), mode="rb").read())
+    assert frame["Area"].tolist() == whole["Area"].tolist()
+    assert (frame["Entry Time"].to_numpy() == whole["Entry Time"].to_numpy()).all()
+
+def test_rewritten_log_is_read_again(tmp_path):
+    log_store = LogStore.open_store(str(tmp_path / "area_log.csv"))
+    log_store.create()
+    append_rows(log_store, 0, 5)
+    reader = LogReader.LogReader(log_store.get_log_file())
+    assert len(reader.read()) == 5
+
+    (tmp_path / "area_log.csv").unlink()
+    log_store.create()
+    append_rows(log_store, 10, 2)
+    assert reader.read()["Area"].tolist() == ["Breaks", "Training"]
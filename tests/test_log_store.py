@@ -0,0 +1,53 @@
+import datetime
+import time
+import LogStore
+
+#----------------------------------------------------------------------------------------------------------
+# Binary logs shared by stores with different area lists
+#----------------------------------------------------------------------------------------------------------
+def test_binary_store_sees_areas_added_by_another_store(tmp_path):
+    log_file = str(tmp_path / "area_log.bin")
+    today = datetime.date(2026, 10, 12)
+    start = time.mktime((2026, 10, 12, 12, 0, 0, 0, 0, -1))
+    reader = LogStore.open_store(log_file, {"Training": 1, "Breaks": 2})
+    reader.create()
+    reader.append("Training", start, start + 10)
+    assert reader.read_day(today)["Area"].tolist() == ["Training"]
+
+    # Another app, with its own area list, adds names the reader has never seen
+    writer = LogStore.open_store(log_file, {"ESS Chambers": 1})
+    writer.append("ESS Chambers", start + 20, start + 30)
+    writer.append("E3 Projects", start + 40, start + 45)
+
+    assert reader.read_day(today)["Area"].tolist() == ["Training", "ESS Chambers", "E3 Projects"]
+    assert reader.area_seconds_between(today, today) == {"Training": 10.0, "ESS Chambers": 10.0,
+                                                         "E3 Projects": 5.0}
+    assert reader.get_rollup().day_totals(today) == {"Training": 10.0, "ESS Chambers": 10.0, "E3 Projects": 5.0}
+
+    # A name new to both gets a code neither has used
+    reader.append("Meeting", start + 50, start + 51)
+    codes = LogStore.open_store(log_file).get_area_codes()
+    assert len(set(codes.values())) == len(codes) == 5
+
+#----------------------------------------------------------------------------------------------------------
+# Range totals: whole days from the rollup, partial ranges from the interval index
+#----------------------------------------------------------------------------------------------------------
+def test_range_totals_follow_appends(tmp_path):
+    store = LogStore.open_store(str(tmp_path / "area_log.csv"))
+    store.create()
+    monday = datetime.date(2026, 10, 12)
+    day = time.mktime((2026, 10, 12, 0, 0, 0, 0, 0, -1))
+    store.append("Training", day + 8 * 3600, day + 9 * 3600)
+    # Crosses midnight into Tuesday
+    store.append("Breaks", day + 23 * 3600, day + 25 * 3600)
+
+    assert store.area_seconds_between(monday, monday) == {"Training": 3600.0, "Breaks": 3600.0}
+    week = store.area_seconds_between(monday, monday + datetime.timedelta(days=6))
+    assert week == {"Training": 3600.0, "Breaks": 7200.0}
+    assert store.area_seconds_between(monday, monday + datetime.timedelta(days=1)) == week
+    assert store.area_seconds(day + 8.5 * 3600, day + 24.5 * 3600) == {"Training": 1800.0, "Breaks": 5400.0}
+
+    # Appends to days the interval index already holds are picked up without counting old entries twice
+    store.append("Training", day + 10 * 3600, day + 11 * 3600)
+    assert store.area_seconds(day + 8.5 * 3600, day + 24.5 * 3600) == {"Training": 5400.0, "Breaks": 5400.0}
+    assert store.area_seconds_between(monday, monday)["Training"] == 7200.0
@@ -0,0 +1,26 @@
+import pytest
+import Profiler
+
+@pytest.fixture(autouse=True)
+def profiler():
+    Profiler.enable()
+    Profiler.reset()
+    yield
+    Profiler.reset()
+    Profiler.enable(False)
+
+def test_histogram_rolls_with_the_window(monkeypatch):
+    monkeypatch.setattr(Profiler, "window", 10)
+    for _ in range(10):
+        Profiler.record("phase", 2.0)
+    for _ in range(25):
+        Profiler.record("phase", 0.0005)
+    row, = Profiler.span_summary()
+    assert row["calls"] == 35
+    assert [row[label] for label in Profiler.bucket_labels] == [10, 0, 0, 0, 0]
+
+def test_histogram_buckets():
+    for seconds in (0.0005, 0.001, 0.005, 0.05, 0.5, 1.0, 3.0):
+        Profiler.record("phase", seconds)
+    row, = Profiler.span_summary()
+    assert [row[label] for label in Profiler.bucket_labels] == [1, 2, 1, 1, 2]
@@ -0,0 +1,39 @@
+import datetime
+import time
+import LogStore
+import TeamRollup
+
+def make_logs(tmp_path):
+    log_file = str(tmp_path / "area_log.csv")
+    day = time.mktime((2026, 10, 12, 9, 0, 0, 0, 0, -1))
+    for user in ("alice", "bob"):
+        store = LogStore.open_store(TeamRollup.user_log_file(log_file, user), user=user)
+        store.create()
+        store.append_many([("Training", day + i * 86400, day + i * 86400 + 3600) for i in range(7)])
+    return log_file, day
+
+#----------------------------------------------------------------------------------------------------------
+# Per-day totals cached by file version
+#----------------------------------------------------------------------------------------------------------
+def test_new_range_reuses_unchanged_logs(tmp_path):
+    log_file, day = make_logs(tmp_path)
+    rollup = TeamRollup.TeamRollup(log_file)
+    monday = datetime.date(2026, 10, 12)
+    try:
+        week = rollup.area_seconds_between(monday, monday + datetime.timedelta(days=6))
+        assert week == {("alice", "Training"): 7 * 3600.0, ("bob", "Training"): 7 * 3600.0}
+        assert rollup.get_files_read() == 2
+
+        # Ranges inside days already read come from the cache
+        assert rollup.area_seconds_between(monday + datetime.timedelta(days=2), monday + datetime.timedelta(days=3)) \
+            == {("alice", "Training"): 2 * 3600.0, ("bob", "Training"): 2 * 3600.0}
+        assert rollup.get_files_read() == 2
+
+        # Only the log that changed is read again
+        store = LogStore.open_store(TeamRollup.user_log_file(log_file, "bob"), user="bob")
+        store.append("Breaks", day + 2 * 3600, day + 3 * 3600)
+        assert rollup.area_seconds_between(monday, monday) \
+            == {("alice", "Training"): 3600.0, ("bob", "Training"): 3600.0, ("bob", "Breaks"): 3600.0}
+        assert rollup.get_files_read() == 3
+    finally:
+        rollup.close()
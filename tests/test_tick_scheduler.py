@@ -0,0 +1,130 @@
+import os
+import runpy
+from unittest import mock
+import pytest
+import TickScheduler
+
+app_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "TE Timekeeping.py")
+
+#----------------------------------------------------------------------------------------------------------
+# Stand-in for a Tk root: after() callbacks are held until fire() runs them
+#----------------------------------------------------------------------------------------------------------
+class FakeRoot:
+    def __init__(self):
+        self.pending = {}
+        self._next_id = 0
+
+    def after(self, ms, callback):
+        self._next_id += 1
+        after_id = f"after#{self._next_id}"
+        self.pending[after_id] = callback
+        return after_id
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def after_idle(self, callback):
+        pass
+
+    def fire(self):
+        for after_id, callback in list(self.pending.items()):
+            del self.pending[after_id]
+            callback()
+
+    def __getattr__(self, name):
+        # title(), geometry(), mainloop(), ... do nothing
+        return lambda *args, **kwargs: None
+
+#----------------------------------------------------------------------------------------------------------
+# TickScheduler on its own
+#----------------------------------------------------------------------------------------------------------
+def test_start_keeps_one_timer_pending():
+    root = FakeRoot()
+    ticker = TickScheduler.TickScheduler(root, interval=1000)
+    for _ in range(10):
+        ticker.start()
+    assert ticker.get_pending_count() == 1
+    assert len(root.pending) == 1
+
+    for _ in range(5):
+        root.fire()
+        ticker.start()
+    assert ticker.get_pending_count() == 1
+    assert len(root.pending) == 1
+
+def test_stop_cancels_the_timer():
+    root = FakeRoot()
+    ticker = TickScheduler.TickScheduler(root)
+    ticker.start()
+    ticker.stop()
+    assert ticker.get_pending_count() == 0
+    assert not root.pending
+    assert not ticker.is_running()
+
+def test_draws_only_when_text_changes():
+    root = FakeRoot()
+    ticker = TickScheduler.TickScheduler(root)
+    texts = iter(["0 sec", "0 sec", "1 sec", "1 sec"])
+    drawn = []
+    ticker.subscribe(lambda: next(texts), drawn.append)
+    ticker.start()
+    for _ in range(3):
+        root.fire()
+    assert drawn == ["0 sec", "1 sec"]
+
+def test_unsubscribed_widgets_are_not_drawn():
+    root = FakeRoot()
+    ticker = TickScheduler.TickScheduler(root)
+    drawn = []
+    token = ticker.subscribe(lambda: "text", drawn.append)
+    ticker.unsubscribe(token)
+    ticker.start()
+    assert drawn == []
+
+#----------------------------------------------------------------------------------------------------------
+# The Tk app, with its widgets mocked out and its root replaced by FakeRoot
+#----------------------------------------------------------------------------------------------------------
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    tkinter = pytest.importorskip("tkinter")
+    from tkinter import ttk
+    monkeypatch.chdir(tmp_path)
+    root = FakeRoot()
+    monkeypatch.setattr(tkinter, "Tk", lambda: root)
+    for widget in ("Frame", "Canvas", "Label", "Button"):
+        monkeypatch.setattr(tkinter, widget, mock.MagicMock())
+    monkeypatch.setattr(ttk, "Scrollbar", mock.MagicMock())
+    return runpy.run_path(app_file, run_name="tk_app"), root
+
+def test_switching_areas_keeps_one_timer_pending(app):
+    app, root = app
+    app["start_log"]()
+    for i in range(20):
+        app["switch_area"](app["areas"][i % len(app["areas"]) + 1])
+        if i % 3 == 0:
+            root.fire()
+    assert app["ticker"].get_pending_count() == 1
+    assert len(root.pending) == 1
+
+def test_display_text_shows_whole_seconds(app, monkeypatch):
+    app, root = app
+    app["start_log"]()
+    start = app["timePeriod1"].get_start_time()
+    monkeypatch.setattr(app["time"], "time", lambda: start + 2.75)
+    assert app["display_text"]().endswith("Time Spent: 2 sec")
+
+def test_label_redrawn_once_per_second(app, monkeypatch):
+    app, root = app
+    clock = [1000.0]
+    monkeypatch.setattr(app["time"], "time", lambda: clock[0])
+    app["start_log"]()
+    label = app["label"]
+    label.config.reset_mock()
+    # Ten ticks 0.09 s apart stay within the first second
+    for _ in range(10):
+        clock[0] += 0.09
+        root.fire()
+    assert label.config.call_count == 0
+    clock[0] += 0.2
+    root.fire()
+    assert label.config.call_count == 1
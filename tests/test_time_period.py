@@ -0,0 +1,27 @@
+import pytest
+import TimePeriod
+
+def test_defaults_are_none():
+    period = TimePeriod.TimePeriod()
+    assert period.get_start_time() is None
+    assert period.get_stop_time() is None
+    assert period.get_area_name() is None
+
+def test_constructor_sets_fields():
+    period = TimePeriod.TimePeriod(start_time=10.0, stop_time=25.5, area_name="Training")
+    assert period.get_start_time() == 10.0
+    assert period.get_stop_time() == 25.5
+    assert period.get_area_name() == "Training"
+
+def test_setters():
+    period = TimePeriod.TimePeriod()
+    period.set_start_time(1.0)
+    period.set_stop_time(2.0)
+    period.set_area_name("Breaks")
+    assert (period.get_start_time(), period.get_stop_time(), period.get_area_name()) == (1.0, 2.0, "Breaks")
+
+def test_slots_have_no_instance_dict():
+    period = TimePeriod.TimePeriod()
+    assert not hasattr(period, "__dict__")
+    with pytest.raises(AttributeError):
+        period.duration = 5